@@ -1,8 +1,11 @@
 import asyncio
+import sys
+from utils.boot_timer import boot_timer
 from aiogram import Bot, Dispatcher
 from aiogram.client.session.middlewares.request_logging import logger
 from aiogram.enums import ChatType
 
+ALLOWED_UPDATES = ['message', 'callback_query', 'chat_member']
 
 
 def setup_handlers(dispatcher: Dispatcher) -> None:
@@ -16,10 +19,17 @@ def setup_middlewares(dispatcher: Dispatcher, bot: Bot) -> None:
     """MIDDLEWARE"""
     from middlewares.throttling import ThrottlingMiddleware
     from middlewares.azolikni_tekshir import ChannelMembershipMiddleware
+    from middlewares.user_profile import UserProfileMiddleware
+    from utils.state import state_backend
     #router.middleware(ChannelMembershipMiddleware(bot=bot, skip_admins=True))
-    # Spamdan himoya qilish uchun klassik ichki o'rta dastur. So'rovlar orasidagi asosiy vaqtlar 0,5 soniya
-    dispatcher.message.middleware(ThrottlingMiddleware(slow_mode_delay=0.5))
+    # Spamdan himoya qilish uchun ichki o'rta dastur: har bir update turi uchun burst + doimiy tezlik
+    throttling = ThrottlingMiddleware(backend=state_backend)
+    dispatcher.message.middleware(throttling)
+    dispatcher.callback_query.middleware(throttling)
     dispatcher.message.middleware(ChannelMembershipMiddleware(bot=bot, skip_admins=True))
+    # Til, ban va admin holati handlerlarga data["profile"] orqali keshdan beriladi
+    dispatcher.message.middleware(UserProfileMiddleware())
+    dispatcher.callback_query.middleware(UserProfileMiddleware())
 
 
 def setup_filters(dispatcher: Dispatcher) -> None:
@@ -47,28 +57,116 @@ async def database_connected():
         db_url=DB_URL,
         modules={"models": ["utils.db.models"]}  # bu yerda model faylingiz
     )
-    await Tortoise.generate_schemas()
+    # Jadvallar har safar tekshirilmaydi: sxema `python app.py migrate` bilan yaratiladi
 
-async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
-    from utils.set_bot_commands import set_default_commands
-    from utils.notify_admins import on_startup_notify
-    from handlers.users.download_media import start_queue_processing
 
-    logger.info("Database connected")
+async def run_migrations():
+    from tortoise import Tortoise
+    from utils.db.migrations import migrate
+
     await database_connected()
+    try:
+        await migrate()
+        logger.info("Migratsiyalar bajarildi")
+    finally:
+        await Tortoise.close_connections()
 
-    logger.info("Starting polling")
-    await bot.delete_webhook(drop_pending_updates=True)
-    await setup_aiogram(bot=bot, dispatcher=dispatcher)
-    await on_startup_notify(bot=bot)
-    await set_default_commands(bot=bot)
-    logger.info("Kutish rejimi ishlamoqda")
-    await start_queue_processing()
 
+_background_tasks = set()
 
 
-async def aiogram_on_shutdown_polling(dispatcher: Dispatcher, bot: Bot):
-    logger.info("Stopping polling")
+async def after_startup(bot: Bot) -> None:
+    """Polling/webhook boshlanishini kutmasligi kerak bo'lgan ishlar"""
+    from utils.set_bot_commands import set_default_commands
+    from utils.notify_admins import on_startup_notify
+    from utils.broadcast import resume_broadcasts
+    from utils.tasks.executor import prewarm_backends
+
+    with boot_timer.phase("commands"):
+        await set_default_commands(bot=bot)
+    with boot_timer.phase("notify"):
+        await on_startup_notify(bot=bot)
+    with boot_timer.phase("broadcasts"):
+        await resume_broadcasts(bot)
+    with boot_timer.phase("prewarm"):
+        await prewarm_backends()
+    logger.info(boot_timer.report("Warmup"))
+
+async def aiogram_on_startup(dispatcher: Dispatcher, bot: Bot) -> None:
+    with boot_timer.phase("imports"):
+        from handlers.users.download_media import start_queue_processing
+        from utils.db.postgres import refresh_admins
+        from utils.profiles import profile_cache
+        from utils.state import state_backend
+        from utils.stats import bot_stats
+        from utils.analytics import download_recorder
+        from utils.metrics import start_metrics_server
+        from data.config import METRICS_HOST, METRICS_PORT
+
+    with boot_timer.phase("database"):
+        await database_connected()
+        await refresh_admins()
+    logger.info("Database connected")
+    profile_cache.start()
+    await state_backend.start()
+    bot_stats.start()
+    download_recorder.start()
+    await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    with boot_timer.phase("webhook"):
+        await setup_webhook(bot)
+    with boot_timer.phase("routers"):
+        await setup_aiogram(bot=bot, dispatcher=dispatcher)
+    with boot_timer.phase("queue"):
+        await start_queue_processing(bot)
+    logger.info("Kutish rejimi ishlamoqda")
+    logger.info(boot_timer.report())
+
+    task = asyncio.create_task(after_startup(bot))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def setup_webhook(bot: Bot) -> None:
+    from data.config import AMQP_URL, WEBHOOK_URL, WEBHOOK_MAX_CONNECTIONS
+
+    if WEBHOOK_URL:
+        from utils.webhook import webhook_secret, webhook_url
+
+        logger.info("Starting webhook")
+        # Har bir nusxa bir xil URL va secret o'rnatadi, bu takrorlansa ham zararsiz
+        await bot.set_webhook(
+            url=webhook_url(),
+            secret_token=webhook_secret(),
+            allowed_updates=ALLOWED_UPDATES,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+    else:
+        logger.info("Starting polling")
+        # Broker bilan ishlaganda to'xtab turgan paytdagi so'rovlar ham yo'qolmasin
+        await bot.delete_webhook(drop_pending_updates=not AMQP_URL)
+
+
+
+async def aiogram_on_shutdown(dispatcher: Dispatcher, bot: Bot):
+    from handlers.users.download_media import stop_queue_processing
+    from utils.broadcast import stop_broadcasts
+    from utils.profiles import profile_cache
+    from utils.state import state_backend
+    from utils.stats import bot_stats
+    from utils.analytics import download_recorder
+    from utils.metrics import stop_metrics_server
+
+    logger.info("Stopping bot")
+    await stop_broadcasts()
+    await stop_queue_processing()
+    # Bazaga hali yozilmagan til o'zgarishlari
+    await profile_cache.stop()
+    # Yuklashlar analitikasining yozilmagan qatorlari (navbat to'xtagandan keyin)
+    await download_recorder.stop()
+    await bot_stats.stop()
+    await stop_metrics_server()
+    await state_backend.close()
     await bot.session.close()
     await dispatcher.storage.close()
 
@@ -78,20 +176,37 @@ def main():
     from data.config import BOT_TOKEN
     from aiogram.client.default import DefaultBotProperties
     from aiogram.enums import ParseMode
-    from aiogram.fsm.storage.memory import MemoryStorage
+    from middlewares.request_limiter import request_limiter
+    from middlewares.api_metrics import api_metrics
+    from utils.state import BackendStorage, state_backend
+    from data.config import WEBHOOK_URL
 
     bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
+    bot.session.middleware(request_limiter)
+    bot.session.middleware(api_metrics)
+    # FSM holati ham StateBackend da: keyingi xabar boshqa nusxaga tushsa ham yo'qolmaydi
+    storage = BackendStorage(state_backend)
     dispatcher = Dispatcher(storage=storage)
 
-    dispatcher.startup.register(aiogram_on_startup_polling)
-    dispatcher.shutdown.register(aiogram_on_shutdown_polling)
-    asyncio.run(dispatcher.start_polling(bot, close_bot_session=True))
-    # allowed_updates=['message', 'chat_member']
+    dispatcher.startup.register(aiogram_on_startup)
+    dispatcher.shutdown.register(aiogram_on_shutdown)
+
+    if WEBHOOK_URL:
+        from utils.webhook import run_webhook
+
+        run_webhook(dispatcher, bot)
+        return
+
+    # chat_member yangilanishlari faqat allowed_updates da so'ralganda keladi.
+    # Routerlar startup da ulanadi, shuning uchun resolve_used_update_types() bu yerda bo'sh
+    asyncio.run(dispatcher.start_polling(bot, close_bot_session=True, allowed_updates=ALLOWED_UPDATES))
 
 
 if __name__ == "__main__":
     try:
-        main()
+        if sys.argv[1:2] == ["migrate"]:
+            asyncio.run(run_migrations())
+        else:
+            main()
     except KeyboardInterrupt:
         logger.info("Bot stopped!")
@@ -1,11 +1,22 @@
+from typing import Iterable, Optional, Union
+
 from aiogram.filters import BaseFilter
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
+
+from utils.db.postgres import admin_ids
 
 
 class IsBotAdminFilter(BaseFilter):
-    def __init__(self, user_ids: list):
-        self.user_ids = user_ids
+    """
+    user_ids berilmasa xotiradagi admin ID lari to'plami ishlatiladi, baza
+    faqat u ADMINS_CACHE_TTL dan eskirganda so'raladi
+    """
+
+    def __init__(self, user_ids: Optional[Iterable[int]] = None):
+        self.user_ids = frozenset(int(id) for id in user_ids) if user_ids is not None else None
 
-    async def __call__(self, message: Message) -> bool:
-        admin_ids_int = [int(id) for id in self.user_ids]
-        return int(message.from_user.id) in admin_ids_int
+    async def __call__(self, event: Union[Message, CallbackQuery]) -> bool:
+        if event.from_user is None:
+            return False
+        user_ids = self.user_ids if self.user_ids is not None else await admin_ids()
+        return event.from_user.id in user_ids
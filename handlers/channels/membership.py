@@ -0,0 +1,19 @@
+from aiogram import Router, types
+
+from middlewares.azolikni_tekshir import is_chat_member, update_membership
+from utils.db.postgres import get_all_channels
+
+router = Router()
+
+
+# Telegram chat_member yangilanishlarini faqat bot admin bo'lgan kanallardan yuboradi
+@router.chat_member()
+async def track_channel_member(update: types.ChatMemberUpdated):
+    channel_ids = {channel.channel_id for channel in await get_all_channels()}
+    if update.chat.id not in channel_ids:
+        return
+    await update_membership(
+        user_id=update.new_chat_member.user.id,
+        channel_id=update.chat.id,
+        is_member=is_chat_member(update.new_chat_member),
+    )
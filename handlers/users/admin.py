@@ -1,22 +1,35 @@
 import logging
 import asyncio
+import os
+import time
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import FSInputFile
 
 from loader import bot
+from data.config import EXPORT_CHUNK_SIZE
 from keyboards.inline.buttons import are_you_sure_markup
 from states.test import AdminState, AdminStates
 from filters.admin import IsBotAdminFilter
 from utils.db.postgres import (
     get_all_admins, select_all_users, select_all_user_ids, delete_all_users,
     add_channel, delete_channel, get_all_channels,
-    get_user, select_all_users
+    get_user, select_all_users, refresh_admins
     )
-from utils.pgtoexcel import export_to_excel
+from utils.pgtoexcel import export_users, EXPORT_FORMATS
+from utils.profiles import profile_cache
+from utils.stats import bot_stats
+from utils.state import state_backend
+from utils.broadcast import (
+    start_broadcast, current_broadcast, pause_broadcast, resume_broadcast, cancel_broadcast
+)
 
 router = Router()
+# Router darajasidagi filtr: admin bo'lmaganlarning xabarlari bu routerga kirmaydi,
+# tekshiruv esa xotiradagi admin ID lari to'plamida bajariladi
+router.message.filter(IsBotAdminFilter())
+router.callback_query.filter(IsBotAdminFilter())
 
 # 📌 bot ishga tushganda admin ro'yxatini cache qilamiz
 
@@ -28,14 +41,12 @@ router = Router()
 
 @router.message(Command('admin'))
 async def admin_panel(message: types.Message):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     text = (
         "👮‍♂️ Admin panelga xush kelibsiz!\n\n"
         "Quyidagi buyruqlarni bajarishingiz mumkin:\n"
-        "/allusers - Barcha foydalanuvchilar ro'yxatini Excelga eksport qilish\n"
+        "/allusers [xlsx|csv|parquet] - Barcha foydalanuvchilar ro'yxatini eksport qilish\n"
         "/reklama - Reklama postini yuborish\n"
+        "/reklama_pause, /reklama_resume, /reklama_cancel - Reklamani boshqarish\n"
         "/cleandb - Baza ma'lumotlarini tozalash"
         "/addchannel - Kanal qo‘shish\n"
         "/delchannel - Kanal o‘chirish\n"
@@ -48,31 +59,46 @@ async def admin_panel(message: types.Message):
     await message.answer(text)
 
 
+# Eksport fon vazifalari: handler darhol qaytadi, fayl tayyor bo'lganda yuboriladi
+_export_tasks = set()
+
+
+async def send_users_export(message: types.Message, fmt: str):
+    file_path = f"data/users_{message.chat.id}_{message.message_id}.{fmt}"
+    started = time.monotonic()
+    try:
+        total = await export_users(file_path, fmt=fmt, chunk_size=EXPORT_CHUNK_SIZE)
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed > 0 else total
+        logging.info(f"Users export ({fmt}): {total} qator, {elapsed:.2f}s, {rate:.0f} qator/s")
+        await message.answer_document(
+            FSInputFile(file_path),
+            caption=f"👥 {total} ta foydalanuvchi\n⏱ {elapsed:.1f} s ({rate:.0f} qator/s)"
+        )
+    except Exception as e:
+        logging.exception("Users export failed")
+        await message.answer(f"❌ Eksportda xatolik: {e}")
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
 @router.message(Command('allusers'))
-async def get_all_users(message: types.Message):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
+async def get_all_users(message: types.Message, command: CommandObject):
+    fmt = (command.args or "xlsx").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        await message.answer(f"⚠️ Format: {', '.join(EXPORT_FORMATS)}")
         return
 
-    users = await select_all_users()
-    
-    file_path = "data/users_list.xlsx"
-    await export_to_excel(
-        data=users,
-        headings=['ID', 'Full Name', 'Username', 'Telegram ID', 'Is Admin', 'Is Banned', 'Created At'],
-        filepath=file_path
-    )
-
-    await message.answer_document(FSInputFile(file_path))
+    await message.answer("⏳ Eksport tayyorlanmoqda...")
+    task = asyncio.create_task(send_users_export(message, fmt))
+    _export_tasks.add(task)
+    task.add_done_callback(_export_tasks.discard)
 
 
 # 🔹 2. Admindan reklama postini so'rash
 @router.message(Command('reklama'))
 async def ask_ad_content(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas"
-                             )
-        return
     await message.answer("📢 Reklama uchun postni yuboring:")
     await state.set_state(AdminState.ask_ad_content)
 
@@ -80,30 +106,47 @@ async def ask_ad_content(message: types.Message, state: FSMContext):
 # 🔹 3. Reklamani barcha foydalanuvchilarga yuborish
 @router.message(AdminState.ask_ad_content)
 async def send_ad_to_users(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
-    users_for_advertisement = await select_all_user_ids() 
-    count = 0
-
-    for user_id in users_for_advertisement:
-        try:
-            await message.send_copy(chat_id=user_id)
-            count += 1
-            await asyncio.sleep(0.05)  # antispam delay
-        except Exception as error:
-            logging.info(f"🚫 Reklama yuborilmadi: {user_id}. Xatolik: {error}")
-
-    await message.answer(f"✅ Reklama {count} ta foydalanuvchiga yuborildi.")
     await state.clear()
+    if await current_broadcast():
+        await message.answer("⚠️ Oldingi reklama hali tugamagan. /reklama_cancel bilan bekor qiling.")
+        return
+    # Yuborish fon vazifasida bajariladi, holat xabari jarayon davomida yangilanadi
+    await start_broadcast(message.bot, message)
+
+
+@router.message(Command('reklama_pause'))
+async def pause_ad(message: types.Message):
+    broadcast = await current_broadcast()
+    if not broadcast or broadcast.status != broadcast.STATUS_RUNNING:
+        await message.answer("❌ Yuborilayotgan reklama yo'q.")
+        return
+    await pause_broadcast(broadcast)
+    await message.answer(f"⏸ Reklama #{broadcast.id} pauza qilindi.")
+
+
+@router.message(Command('reklama_resume'))
+async def resume_ad(message: types.Message):
+    broadcast = await current_broadcast()
+    if not broadcast or broadcast.status != broadcast.STATUS_PAUSED:
+        await message.answer("❌ Pauzadagi reklama yo'q.")
+        return
+    await resume_broadcast(message.bot, broadcast)
+    await message.answer(f"▶️ Reklama #{broadcast.id} davom ettirilmoqda.")
+
+
+@router.message(Command('reklama_cancel'))
+async def cancel_ad(message: types.Message):
+    broadcast = await current_broadcast()
+    if not broadcast:
+        await message.answer("❌ Faol reklama yo'q.")
+        return
+    await cancel_broadcast(message.bot, broadcast)
+    await message.answer(f"❌ Reklama #{broadcast.id} bekor qilindi.")
 
 
 # 🔹 4. Bazani tozalashdan oldin tasdiqlash
 @router.message(Command('cleandb'))
 async def ask_are_you_sure(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     msg = await message.reply(
         "⚠️ Haqiqatdan ham bazani tozalamoqchimisiz?",
         reply_markup=are_you_sure_markup
@@ -115,14 +158,12 @@ async def ask_are_you_sure(message: types.Message, state: FSMContext):
 # 🔹 5. Callback orqali bazani tozalashni tasdiqlash yoki rad etish
 @router.callback_query(AdminState.are_you_sure)
 async def clean_db(call: types.CallbackQuery, state: FSMContext):
-    if call.message.from_user.id not in await get_all_admins():
-        await call.message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     data = await state.get_data()
     msg_id = data.get('msg_id')
 
     if call.data == 'yes':
         await delete_all_users()
+        profile_cache.clear()
         text = "✅ Ma'lumotlar bazasi tozalandi."
     elif call.data == 'no':
         text = "❌ Amal bekor qilindi."
@@ -139,17 +180,11 @@ async def clean_db(call: types.CallbackQuery, state: FSMContext):
 # 🔹 Kanal qo‘shish
 @router.message(Command('addchannel'))
 async def add_channel_cmd(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     await message.answer("➕ Kanal username va ID sini quyidagicha yuboring:\n\n`@kanal_username | kanal_id`")
     await state.set_state(AdminStates.add_channel)
 
 @router.message(AdminStates.add_channel)
 async def save_channel(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     try:
         text = message.text
         username, channel_id = text.split("|")
@@ -164,17 +199,11 @@ async def save_channel(message: types.Message, state: FSMContext):
 # 🔹 Kanal o‘chirish
 @router.message(Command('delchannel'))
 async def delete_channel_cmd(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     await message.answer("➖ O‘chirish uchun kanal ID sini yuboring:")
     await state.set_state(AdminStates.del_channel)
 
 @router.message(AdminStates.del_channel)
 async def delete_channel_action(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     try:
         channel_id = int(message.text)
         await delete_channel(channel_id)
@@ -188,22 +217,18 @@ from utils.db.postgres import get_user
 
 @router.message(Command('addadmin'))
 async def add_admin_cmd(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return 
     await message.answer("➕ Admin qilmoqchi bo‘lgan foydalanuvchi ID sini yuboring:")
     await state.set_state(AdminStates.add_admin)
 
 @router.message(AdminStates.add_admin)
 async def add_admin_action(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     telegram_id = int(message.text)
     user = await get_user(telegram_id)
     if user:
         user.is_admin = True
         await user.save()
+        await refresh_admins()
+        profile_cache.invalidate([telegram_id])
         await message.answer("✅ Admin qo‘shildi.")
        
     else:
@@ -213,22 +238,18 @@ async def add_admin_action(message: types.Message, state: FSMContext):
 # 🔹 Admin o‘chirish
 @router.message(Command('deladmin'))
 async def del_admin_cmd(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     await message.answer("➖ Adminlikdan olib tashlamoqchi bo‘lgan foydalanuvchi ID sini yuboring:")
     await state.set_state(AdminStates.del_admin)
 
 @router.message(AdminStates.del_admin)
 async def del_admin_action(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     telegram_id = int(message.text)
     user = await get_user(telegram_id)
     if user and user.is_admin:
         user.is_admin = False
         await user.save()
+        await refresh_admins()
+        profile_cache.invalidate([telegram_id])
         await message.answer("✅ Adminlikdan olib tashlandi.")
        
     else:
@@ -236,49 +257,66 @@ async def del_admin_action(message: types.Message, state: FSMContext):
     await state.clear()
 
 # 🔹 Botni pauza qilish
-PAUSE = False
+# Holat StateBackend da: barcha bot nusxalari bir xil qiymatni ko'radi
+PAUSE_KEY = "bot:paused"
+
+
+async def is_paused() -> bool:
+    return bool(await state_backend.get(PAUSE_KEY))
+
 
 @router.message(Command('pausebot'))
 async def pause_bot(message: types.Message):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
-    global PAUSE
-    PAUSE = not PAUSE
-    holat = "⏸ Pauzada" if PAUSE else "▶️ Aktiv"
+    paused = not await is_paused()
+    await state_backend.set(PAUSE_KEY, paused)
+    holat = "⏸ Pauzada" if paused else "▶️ Aktiv"
     await message.answer(f"Bot holati: {holat}")
 
 # 🔹 Statistika
 @router.message(Command('stat'))
 async def show_stats(message: types.Message):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
-    from utils.db.postgres import select_all_users
-    users = await select_all_users()
-    total = len(users)
-    banned = len([u for u in users if u[5]])  # is_banned 5-chi index
-    await message.answer(f"📊 Statistika:\n\nJami foydalanuvchilar: {total}\nBlok qilganlar: {banned}")
+    # Sonlar xotiradagi hisoblagichlardan, bazaga faqat hali tenglashtirilmagan bo'lsa murojaat qilinadi
+    if bot_stats.reconciled_at is None:
+        await bot_stats.reconcile()
+
+    stats = bot_stats
+    blocked = max(stats.users_total - stats.users_banned - stats.users_active, 0)
+    lines = [
+        "📊 Statistika:\n",
+        f"Jami foydalanuvchilar: {stats.users_total}",
+        f"Faol: {stats.users_active}",
+        f"Botni bloklaganlar: {blocked}",
+        f"Ban qilinganlar: {stats.users_banned}",
+        f"\n🆕 Yangi foydalanuvchilar ({stats.days} kun):",
+    ]
+    lines += [f"{day:%d.%m}: {count}" for day, count in stats.new_users_by_day().items()]
+    platforms = stats.downloads + stats.download_failures
+    if platforms:
+        lines.append(f"\n📥 Yuklashlar ({stats.days} kun):")
+        for platform, _ in platforms.most_common():
+            line = f"{platform}: {stats.downloads[platform]} (xato: {stats.download_failures[platform]})"
+            if platform in stats.download_seconds:
+                line += f", o'rtacha {stats.download_seconds[platform]:.1f} s"
+            lines.append(line)
+    lines.append(f"\n🕒 Bazadan yangilangan: {stats.reconciled_at:%H:%M:%S} UTC")
+    await message.answer("\n".join(lines))
 
 # 🔹 Foydalanuvchini ban qilish
 @router.message(Command('ban'))
 async def ban_user_cmd(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     await message.answer("🚫 Ban qilmoqchi bo‘lgan foydalanuvchi ID sini yuboring:")
     await state.set_state(AdminStates.ban_user)
 
 @router.message(AdminStates.ban_user)
 async def ban_user_action(message: types.Message, state: FSMContext):
-    if message.from_user.id not in await get_all_admins():
-        await message.answer("⚠️ Sizga kirish mumkin emas")
-        return
     telegram_id = int(message.text)
     user = await get_user(telegram_id)
     if user:
+        if not user.is_banned:
+            bot_stats.user_banned(was_active=user.is_active)
         user.is_banned = True
         await user.save()
+        profile_cache.invalidate([telegram_id])
         await message.answer("✅ Foydalanuvchi ban qilindi.")
     else:
         await message.answer("❌ Bunday foydalanuvchi topilmadi.")
@@ -1,42 +1,86 @@
 import asyncio
+import logging
 import os
 import tempfile
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from contextlib import nullcontext
+from typing import Dict, List, NamedTuple, Optional
 from pathlib import Path
-from collections import deque
 import aiogram
-from aiogram import types, Router, F
+from aiogram import Bot, types, Router, F
 from aiogram.filters import Command
 from aiogram.types import FSInputFile, InputMediaVideo, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.chat_action import ChatActionSender
-from aiogram.exceptions import TelegramRetryAfter
+from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest
 from filters.video_filter import VideoTypeFilter
 import time
 from utils.lang import lang as LANGUAGES
 # Import required modules
-from .youtube import download_video, download_audio, get_video_info, is_valid_youtube_url, format_duration, format_file_size
-from .instagram import download_instagram_video
-from .tiktok import download_tiktok_video, is_tiktok_url, get_tiktok_info, cleanup_file
+from .youtube import download_video, download_audio, convert_to_audio, is_valid_youtube_url, format_duration, format_file_size
+from .instagram import get_instagram_video, download_instagram_video
+from .tiktok import download_tiktok_video, is_tiktok_url, cleanup_file
+from utils.tasks.pool import DownloadWorkerPool
+from utils.media_cache import media_cache
+from utils.media_id import parse_media_key
+from utils.singleflight import SingleFlight
+from utils.tasks.jobs import DownloadJob
+from utils.tasks.broker import create_download_queue, is_in_memory
+from utils.tasks.executor import get_backend, shutdown_backends
+from utils.http_fetch import close_session
+from utils.tasks.workdir import job_workdir, clear_stale_workdirs
+from utils.tasks.extractor import MediaResult
+from utils.media_store import media_store
+from utils.profiles import profile_cache
+from utils.quota import HourlyQuota
+from utils.analytics import DownloadRecord, download_recorder
+from utils.metrics import registry
+from utils.db.models import Download
+from utils.state import state_backend
+from data.config import AMQP_URL, INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD
 
 # Language configuration
 
 router = Router()
 
-# User languages
-user_languages: Dict[int, str] = {}
 # Rate limiting and queue system
-user_download_history: Dict[int, List[datetime]] = {}
-download_queue = deque()
 last_progress_update = {}
 progress_cache = {}
 MAX_DOWNLOADS_PER_HOUR = 20
+download_quota = HourlyQuota(state_backend, limit=MAX_DOWNLOADS_PER_HOUR, period=3600)
 MAX_CONCURRENT_DOWNLOADS = 10
-current_downloads = 0
+download_pool = DownloadWorkerPool(workers=MAX_CONCURRENT_DOWNLOADS)
+# Broker queue, when jobs are executed by separate worker processes (worker.py)
+job_queue = None
+# Downloads in flight, keyed by (platform, media_id, format)
+inflight = SingleFlight()
+# Flight result when the leader failed for its own reason (blocked chat, upload error)
+LEADER_FAILED = object()
+# Failures in these phases belong to the media, not to the leader
+MEDIA_PHASES = ("extract_time", "download_time")
+
+
+class FlightFailed(NamedTuple):
+    """Flight result when the media itself could not be downloaded"""
+    error: str
+
+
+def flight_result(result, record: DownloadRecord):
+    """What the leader's followers get: the file, the shared error, or LEADER_FAILED to retry"""
+    if result is not None:
+        return result
+    if record.outcome == Download.OUTCOME_FAILED or record.failed_phase in MEDIA_PHASES:
+        return FlightFailed(record.error or "Failed to download video")
+    return LEADER_FAILED
+
+registry.gauge("bot_download_queue_depth", "Navbatda kutayotgan yuklashlar", func=lambda: download_pool.pending)
+registry.gauge("bot_download_slots_busy", "Band yuklash slotlari", func=lambda: download_pool.active)
+registry.gauge("bot_download_slots_total", "Yuklash slotlari soni", func=lambda: download_pool.size)
+registry.gauge("bot_downloads_inflight", "Bir vaqtda yuklanayotgan media (birlashtirilgan)",
+               func=lambda: len(inflight))
+_waiter_tasks = set()
 
 def get_user_language(user_id: int) -> str:
-    """Get user language"""
-    return user_languages.get(user_id, "uz")  # Default: Uzbek
+    """Get user language from the profile cache, without touching the database"""
+    return profile_cache.lang(user_id, "uz")  # Default: Uzbek
 
 def get_text(user_id: int, key: str, **kwargs) -> str:
     """Get text in user's language"""
@@ -45,63 +89,238 @@ def get_text(user_id: int, key: str, **kwargs) -> str:
     return text.format(**kwargs) if kwargs else text
 
 
-
-async def process_download_queue():
-    """Process download queue"""
-    global current_downloads
-    
-    while True:
-        if download_queue and current_downloads < MAX_CONCURRENT_DOWNLOADS:
-            task = download_queue.popleft()
-            current_downloads += 1
-            asyncio.create_task(task())
-        await asyncio.sleep(0.1)
-
-def check_rate_limit(user_id: int) -> bool:
+async def check_rate_limit(user_id: int) -> bool:
     """Check user rate limit"""
-    now = datetime.now()
-    hour_ago = now - timedelta(hours=1)
+    return await download_quota.allowed(user_id)
+
+async def get_remaining_downloads(user_id: int) -> int:
+    """Calculate remaining downloads"""
+    return await download_quota.remaining(user_id)
+
+async def update_user_download_history(user_id: int):
+    """Count a finished download against the user's hourly quota"""
+    await download_quota.consume(user_id)
+
+async def send_cached_media(message: types.Message, url: str, fmt: str, record: DownloadRecord) -> bool:
+    """Send media straight from the file_id cache, without downloading"""
+    key = parse_media_key(url)
+    if key is None:
+        return False
+    platform, media_id = key
+
+    try:
+        entry = await media_cache.get(platform, media_id, fmt)
+    except Exception as e:
+        logging.error(f"Media keshini o'qishda xatolik: {e}")
+        return False
+    if entry is None:
+        return False
+
+    user_id = message.from_user.id
+    if not await check_rate_limit(user_id):
+        limit_key = 'audio_limit_exceeded' if fmt == "audio" else 'rate_limit_exceeded'
+        await message.reply(get_text(user_id, limit_key), parse_mode="HTML")
+        record.outcome = Download.OUTCOME_RATE_LIMITED
+        download_recorder.record(record)
+        return True
+
+    try:
+        with record.phase("upload_time"):
+            if fmt == "audio":
+                await message.reply_audio(audio=entry.file_id, caption=entry.caption, parse_mode="HTML")
+            else:
+                await message.reply_video(video=entry.file_id, caption=entry.caption, parse_mode="HTML")
+    except TelegramBadRequest as e:
+        logging.warning(f"Keshdagi file_id yaroqsiz ({platform}/{media_id}): {e}")
+        await media_cache.forget(platform, media_id, fmt)
+        record.upload_time = 0.0
+        return False
+
+    await update_user_download_history(user_id)
+    record.outcome = Download.OUTCOME_CACHED
+    download_recorder.record(record)
+    return True
+
+async def remember_sent_media(url: str, fmt: str, sent: types.Message, caption: Optional[str]):
+    """Store file_id of the uploaded media for later requests"""
+    key = parse_media_key(url)
+    media = sent.audio if fmt == "audio" else sent.video
+    if key is None or media is None:
+        return
+    try:
+        await media_cache.put(key[0], key[1], fmt, media.file_id, caption)
+    except Exception as e:
+        logging.error(f"Media keshiga yozishda xatolik: {e}")
+
+def stored_media(url: str, fmt: str) -> Optional[MediaResult]:
+    """Take the file from the local media store, if it was downloaded before"""
+    key = parse_media_key(url)
+    entry = media_store.get(key[0], key[1], fmt) if key else None
+    if entry is None:
+        return None
+    return MediaResult(
+        success=True,
+        file_path=entry['path'],
+        media_id=key[1],
+        file_size=entry['size'],
+        **entry['meta']
+    )
+
+def store_media(url: str, fmt: str, result: MediaResult) -> MediaResult:
+    """Move a fresh download into the local media store"""
+    key = parse_media_key(url)
+    if key is None or not result.success:
+        return result
+    try:
+        meta = {'title': result.title, 'uploader': result.uploader, 'duration': result.duration}
+        result.file_path = media_store.publish(key[0], key[1], fmt, result.file_path, meta)
+    except Exception as e:
+        logging.error(f"Faylni media omboriga yozishda xatolik: {e}")
+    return result
+
+def media_flight_key(url: str, fmt: str):
+    """Key used to coalesce identical downloads"""
+    key = parse_media_key(url)
+    return (key[0], key[1], fmt) if key else None
+
+async def enqueue_download(message: types.Message, url: str, kind: str):
+    """Queue a download job, unless the media can be sent from the cache"""
+    user_id = message.from_user.id
     
-    if user_id not in user_download_history:
-        user_download_history[user_id] = []
+    key = parse_media_key(url)
+    record = DownloadRecord(platform=kind, user_id=user_id, media_id=key[1] if key else None)
+    if await send_cached_media(message, url, JOB_KINDS[kind][1], record):
+        return
     
-    user_download_history[user_id] = [
-        download_time for download_time in user_download_history[user_id]
-        if download_time > hour_ago
-    ]
+    job = DownloadJob.from_message(message, url, kind, lang=get_user_language(user_id))
+    position = await submit_job(job, message.bot)
+    if position is None:
+        await message.reply(get_text(user_id, 'queue_added'))
+        return
     
-    return len(user_download_history[user_id]) < MAX_DOWNLOADS_PER_HOUR
+    await message.reply(
+        f"{get_text(user_id, 'queue_added')}\n{get_text(user_id, 'queue_position', position=position)}"
+    )
 
-def get_remaining_downloads(user_id: int) -> int:
-    """Calculate remaining downloads"""
-    if user_id not in user_download_history:
-        return MAX_DOWNLOADS_PER_HOUR
+async def submit_job(job: DownloadJob, bot: Bot) -> Optional[int]:
+    """Put a job on the broker, or on the local pool (returns its position there)"""
+    if job_queue is not None:
+        await job_queue.publish(job)
+        return None
+    return download_pool.submit(process_job, job, bot)
+
+async def process_job(job: DownloadJob, bot: Bot):
+    """Run a queued download job, or join an identical one that is already running"""
+    message = job.as_message(bot)
+    handler, fmt = JOB_KINDS[job.kind]
+    # Worker jarayonida profil keshi bo'sh bo'ladi
+    profile_cache.hint_lang(job.user_id, job.lang)
+    record = DownloadRecord.for_job(job)
     
-    now = datetime.now()
-    hour_ago = now - timedelta(hours=1)
+    if await send_cached_media(message, job.url, fmt, record):
+        return
     
-    recent_downloads = [
-        download_time for download_time in user_download_history[user_id]
-        if download_time > hour_ago
-    ]
+    # Quota is checked before leading or joining a flight: a leader must not fail for a user-specific reason
+    if not await check_rate_limit(job.user_id):
+        limit_key = 'audio_limit_exceeded' if fmt == "audio" else 'rate_limit_exceeded'
+        await message.reply(get_text(job.user_id, limit_key), parse_mode="HTML")
+        record.outcome = Download.OUTCOME_RATE_LIMITED
+        download_recorder.record(record)
+        return
     
-    return max(0, MAX_DOWNLOADS_PER_HOUR - len(recent_downloads))
+    flight_key = media_flight_key(job.url, fmt)
+    if flight_key is None:
+        async with job_workdir(job.kind) as workdir:
+            await run_download(handler, message, job.url, workdir, record)
+        return
+    
+    flight = inflight.get(flight_key)
+    if flight is not None:
+        # Wait outside of the worker slot, the leader job does the download.
+        # enqueue_download already said "queued", this message shows the leader's progress
+        wait_msg = await message.reply(
+            f"📥 {get_text(job.user_id, 'downloading', platform=KIND_PLATFORMS[job.kind])}\n⬜⬜⬜⬜⬜⬜⬜⬜⬜⬜ 0%"
+        )
+        flight.watchers.append((message, wait_msg))
+        task = asyncio.create_task(wait_for_flight(job, message, wait_msg, flight, fmt, record))
+        _waiter_tasks.add(task)
+        task.add_done_callback(_waiter_tasks.discard)
+        return
+    
+    inflight.begin(flight_key)
+    result = None
+    try:
+        # The job directory and everything in it is removed here, success or not
+        async with job_workdir(job.kind) as workdir:
+            result = await run_download(handler, message, job.url, workdir, record, flight_key)
+    finally:
+        # A media failure (bad link, extractor error, timeout) is the same for everyone,
+        # any other failure is the leader's own and a follower retries the download
+        inflight.resolve(flight_key, flight_result(result, record))
 
-async def update_user_download_history(user_id: int):
-    """Update user download history"""
-    if user_id not in user_download_history:
-        user_download_history[user_id] = []
-    user_download_history[user_id].append(datetime.now())
-
-async def cleanup_after_delay(file_path: str, delay_seconds: int = 1):
-    """Delete file after delay"""
-    await asyncio.sleep(delay_seconds)
+async def run_download(handler, message: types.Message, url: str, workdir: Path, record: DownloadRecord, flight_key=None):
+    """Run a download handler and log its timings and outcome"""
+    key = parse_media_key(url)
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"🗑️ File deleted: {file_path}")
+        # The stored file must not be evicted while it is being sent
+        with media_store.pinned(*key) if key else nullcontext():
+            result = await handler(message, url, workdir, record, flight_key)
+    except BaseException:
+        record.outcome = Download.OUTCOME_ERROR
+        raise
+    else:
+        if result is not None:
+            record.outcome = Download.OUTCOME_SUCCESS
+        return result
+    finally:
+        download_recorder.record(record)
+
+async def wait_for_flight(job: DownloadJob, message: types.Message, wait_msg: types.Message, flight, fmt: str, record: DownloadRecord):
+    """Wait for another user's download of the same media and send its file_id"""
+    user_id = message.from_user.id
+    requeued = False
+    try:
+        with record.phase("download_time"):
+            result = await flight.future
+        if result is LEADER_FAILED:
+            # The first follower to run again becomes the new leader, the others join it
+            await submit_job(job, message.bot)
+            requeued = True
+            await wait_msg.delete()
+            return
+        if isinstance(result, FlightFailed):
+            await wait_msg.edit_text(get_text(user_id, 'download_error', error=result.error))
+            return
+        
+        if not await check_rate_limit(user_id):
+            limit_key = 'audio_limit_exceeded' if fmt == "audio" else 'rate_limit_exceeded'
+            await wait_msg.edit_text(get_text(user_id, limit_key), parse_mode="HTML")
+            record.outcome = Download.OUTCOME_RATE_LIMITED
+            return
+        
+        file_id, caption = result
+        with record.phase("upload_time"):
+            if fmt == "audio":
+                await message.reply_audio(audio=file_id, caption=caption, parse_mode="HTML")
+            else:
+                await message.reply_video(video=file_id, caption=caption, parse_mode="HTML")
+        await wait_msg.delete()
+        await update_user_download_history(user_id)
+        record.outcome = Download.OUTCOME_COALESCED
     except Exception as e:
-        print(f"❌ Error deleting file: {e}")
+        record.outcome = Download.OUTCOME_ERROR
+        logging.error(f"Umumiy yuklab olish natijasini yuborishda xatolik: {e}")
+    finally:
+        if not requeued:
+            download_recorder.record(record)
+
+async def report_progress(message: types.Message, progress_msg: types.Message, progress: float, platform: str, flight_key=None):
+    """Update progress for the job owner and for users waiting on the same media"""
+    await send_progress_update(message, progress_msg, progress, platform)
+    flight = inflight.get(flight_key) if flight_key else None
+    if flight is not None:
+        for watcher, watcher_msg in list(flight.watchers):
+            await send_progress_update(watcher, watcher_msg, progress, platform)
 
 def clear_progress_cache(chat_id=None):
     """Clear progress cache"""
@@ -186,7 +405,7 @@ async def send_progress_update(message: types.Message, progress_msg: types.Messa
 async def download_command(message: types.Message):
     """Download command"""
     user_id = message.from_user.id
-    remaining = get_remaining_downloads(user_id)
+    remaining = await get_remaining_downloads(user_id)
     await message.reply(
         get_text(user_id, 'download_help', remaining=remaining),
         parse_mode="HTML"
@@ -196,7 +415,7 @@ async def download_command(message: types.Message):
 async def limit_command(message: types.Message):
     """Limit command"""
     user_id = message.from_user.id
-    remaining = get_remaining_downloads(user_id)
+    remaining = await get_remaining_downloads(user_id)
     await message.answer_sticker("CAACAgEAAxkBAAEO3z5oa7Bk74ZFQroBHztlxhwOr0zr6QACigIAApFJIEQVpamIL42sCjYE")
     await message.reply(
         get_text(user_id, 'limit_info', remaining=remaining),
@@ -215,77 +434,66 @@ async def download_youtube(message: types.Message):
         await message.reply(get_text(user_id, 'invalid_url', platform="YouTube"))
         return
     
-    download_queue.append(lambda: handle_youtube_download(message, url))
-    yuklab_olish_navbati_xabari = await message.reply(get_text(user_id, 'queue_added'))
+    await enqueue_download(message, url, "youtube")
 
-async def handle_youtube_download(message: types.Message, url: str):
+async def handle_youtube_download(message: types.Message, url: str, workdir: Path, record: DownloadRecord, flight_key=None):
     """Handle YouTube video download"""
     user_id = message.from_user.id
     
-    if not check_rate_limit(user_id):
-        await message.answer_sticker("CAACAgEAAxkBAAEO30Boa7Cyzy89w13FoJDHg_WsqLs6MQACpgEAAp-ZWEU7P-6NXtpGaTYE")
-        await message.reply(get_text(user_id, 'rate_limit_exceeded'), parse_mode="HTML")
-        return
-    
     progress_msg = await message.reply(
         f"📥 {get_text(user_id, 'downloading', platform='YouTube')}\n⬜⬜⬜⬜⬜⬜⬜⬜⬜⬜ 0%"
     )
     sticker = await message.answer_sticker("CAACAgEAAxkBAAEO30Roa7D42wTnvGCUy4mjYjgycWnHgAACgAIAAqFjGUSrWD-iBcJN3DYE")
     try:
-        info = get_video_info(url)
-        if 'error' in info:
-            await progress_msg.edit_text(get_text(user_id, 'download_error', error=info['error']))
-            await sticker.delete()
-            return
-        
-        loop = asyncio.get_event_loop()
-        
         def progress_callback(progress):
-            asyncio.run_coroutine_threadsafe(
-                send_progress_update(message, progress_msg, progress, "YouTube"),
-                loop
+            asyncio.create_task(
+                report_progress(message, progress_msg, progress, "YouTube", flight_key)
             )
         
-        result = await asyncio.to_thread(
-            download_video,
-            url,
-            user_id=user_id,
-            progress_hook=progress_callback
-        )
+        result = stored_media(url, "video")
+        if result is None:
+            with record.phase("download_time"):
+                result = await get_backend("youtube").run(
+                    download_video,
+                    url,
+                    output_dir=str(workdir),
+                    on_progress=progress_callback
+                )
+            result = store_media(url, "video", result)
+        record.media(result)
         
-        if result['success']:
+        if result.success:
             await progress_msg.edit_text(get_text(user_id, 'uploading'))
             
             await sticker.delete()
             
-            video_file = FSInputFile(result['file_path'])
+            video_file = FSInputFile(result.file_path)
             caption = (
-                f"📹 <b>{result['title']}</b>\n"
-                f"👤 {result['uploader']}\n"
-                f"⏱️ {format_duration(result['duration'])}\n"
-                f"📊 {format_file_size(result['file_size'])}"
+                f"📹 <b>{result.title}</b>\n"
+                f"👤 {result.uploader}\n"
+                f"⏱️ {format_duration(result.duration)}\n"
+                f"📊 {format_file_size(result.file_size)}"
             )
             
-            async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
-                await message.reply_video(
-                    video=video_file,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
+            with record.phase("upload_time"):
+                async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
+                    sent = await message.reply_video(
+                        video=video_file,
+                        caption=caption,
+                        parse_mode="HTML"
+                    )
+            await remember_sent_media(url, "video", sent, caption)
             await message.answer_sticker("CAACAgEAAxkBAAEO30toa7F5MRpoyDEB96MzPg1OYRxL9wAC-gEAAoyxIER4c3iI53gcxDYE")
             await progress_msg.delete()
             await update_user_download_history(user_id)
-            
-            asyncio.create_task(cleanup_after_delay(result['file_path'], 1))
+            return sent.video.file_id, caption
         else:
-            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result['error']))
+            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result.error))
+            await sticker.delete()
 
     except Exception as e:
+        record.outcome = Download.OUTCOME_ERROR
         await progress_msg.edit_text(get_text(user_id, 'unexpected_error', error=str(e)))
-    
-    finally:
-        global current_downloads
-        current_downloads = max(0, current_downloads - 1)
 
 # Instagram handlers
 @router.message(VideoTypeFilter(platform="instagram_reel"))
@@ -294,70 +502,66 @@ async def download_instagram(message: types.Message):
     url = message.text.strip()
     user_id = message.from_user.id
     
-    download_queue.append(lambda: handle_instagram_download(message, url))
-    await message.reply(get_text(user_id, 'queue_added'))
+    await enqueue_download(message, url, "instagram")
 
-async def handle_instagram_download(message: types.Message, url: str):
+async def handle_instagram_download(message: types.Message, url: str, workdir: Path, record: DownloadRecord, flight_key=None):
     """Handle Instagram video download"""
     user_id = message.from_user.id
     
-    if not check_rate_limit(user_id):
-        await message.answer_sticker("CAACAgEAAxkBAAEO30Boa7Cyzy89w13FoJDHg_WsqLs6MQACpgEAAp-ZWEU7P-6NXtpGaTYE")
-        await message.reply(get_text(user_id, 'rate_limit_exceeded'), parse_mode="HTML")
-        return
-    
     progress_msg = await message.reply(
         f"📥 {get_text(user_id, 'downloading', platform='Instagram')}\n⬜⬜⬜⬜⬜⬜⬜⬜⬜⬜ 0%"
     )
     sticker = await message.answer_sticker("CAACAgEAAxkBAAEO30Roa7D42wTnvGCUy4mjYjgycWnHgAACgAIAAqFjGUSrWD-iBcJN3DYE")
     try:
-        # Get Instagram credentials from environment variables
-        username = os.getenv("INSTAGRAM_USERNAME", "INSTA_USERNAME_KIRIT")
-        password = os.getenv("INSTAGRAM_PASSWORD", "INSTA_PASSWORD_KIRIT")
-        
-        loop = asyncio.get_event_loop()
-        
         def progress_callback(progress):
-            asyncio.run_coroutine_threadsafe(
-                send_progress_update(message, progress_msg, progress, "Instagram"),
-                loop
+            asyncio.create_task(
+                report_progress(message, progress_msg, progress, "Instagram", flight_key)
             )
         
-        result = await asyncio.to_thread(
-            download_instagram_video, 
-            url, 
-            username, 
-            password,
-            progress_callback=progress_callback,
-            debug=False
-        )
+        with record.phase("extract_time"):
+            video_info = await get_backend("instagram").run(
+                get_instagram_video, 
+                url, 
+                INSTAGRAM_USERNAME, 
+                INSTAGRAM_PASSWORD,
+                on_progress=progress_callback,
+                progress_kwarg="progress_callback",
+                debug=False
+            )
+        
+        result = None
+        if video_info:
+            with record.phase("download_time"):
+                result = await download_instagram_video(video_info, str(workdir), progress_callback)
         
         if result:
+            record.file_size = os.path.getsize(result)
             await progress_msg.edit_text(get_text(user_id, 'uploading'))
             
             video_file = FSInputFile(result)
             await sticker.delete()
             
-            async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
-                await message.reply_video(
-                    video=video_file,
-                    caption="📱 <b>Instagram Video</b>",
-                    parse_mode="HTML"
-                )
+            caption = "📱 <b>Instagram Video</b>"
+            with record.phase("upload_time"):
+                async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
+                    sent = await message.reply_video(
+                        video=video_file,
+                        caption=caption,
+                        parse_mode="HTML"
+                    )
+            await remember_sent_media(url, "video", sent, caption)
             
             await progress_msg.delete()
             await message.answer_sticker("CAACAgEAAxkBAAEO30toa7F5MRpoyDEB96MzPg1OYRxL9wAC-gEAAoyxIER4c3iI53gcxDYE")
             await update_user_download_history(user_id)
             
-            asyncio.create_task(cleanup_after_delay(result, 1))
+            return sent.video.file_id, caption
         else:
             await progress_msg.edit_text(get_text(user_id, 'download_error', error="Failed to download video"))
             
     except Exception as e:  
+        record.outcome = Download.OUTCOME_ERROR
         await progress_msg.edit_text(get_text(user_id, 'unexpected_error', error=str(e)))
-    finally:
-        global current_downloads
-        current_downloads = max(0, current_downloads - 1)
 
 # TikTok handlers
 @router.message(VideoTypeFilter(platform="tiktok"))
@@ -370,71 +574,65 @@ async def download_tiktok(message: types.Message):
         await message.reply(get_text(user_id, 'invalid_url', platform="TikTok"))
         return
     
-    download_queue.append(lambda: handle_tiktok_download(message, url))
-    await message.reply(get_text(user_id, 'queue_added'))
+    await enqueue_download(message, url, "tiktok")
 
-async def handle_tiktok_download(message: types.Message, url: str):
+async def handle_tiktok_download(message: types.Message, url: str, workdir: Path, record: DownloadRecord, flight_key=None):
     """Handle TikTok video download"""
     user_id = message.from_user.id
     
-    if not check_rate_limit(user_id):
-        await message.reply(get_text(user_id, 'rate_limit_exceeded'), parse_mode="HTML")
-        return
-    
     progress_msg = await message.reply(
         f"📥 {get_text(user_id, 'downloading', platform='TikTok')}\n⬜⬜⬜⬜⬜⬜⬜⬜⬜⬜ 0%"
     )
     
     try:
-        info = await asyncio.to_thread(get_tiktok_info, url)
-        
-        loop = asyncio.get_event_loop()
-        
         def progress_callback(progress):
-            asyncio.run_coroutine_threadsafe(
-                send_progress_update(message, progress_msg, progress, "TikTok"),
-                loop
+            asyncio.create_task(
+                report_progress(message, progress_msg, progress, "TikTok", flight_key)
             )
         
-        result = await asyncio.to_thread(
-            download_tiktok_video, 
-            url, 
-            output_dir=f"downloads/{user_id}",
-            progress_callback=progress_callback
-        )
+        result = stored_media(url, "video")
+        if result is None:
+            with record.phase("download_time"):
+                result = await get_backend("tiktok").run(
+                    download_tiktok_video, 
+                    url, 
+                    output_dir=str(workdir),
+                    on_progress=progress_callback,
+                    progress_kwarg="progress_callback"
+                )
+            result = store_media(url, "video", result)
+        record.media(result)
         
-        if result['success']:
+        if result.success:
             await progress_msg.edit_text(get_text(user_id, 'uploading'))
             
-            video_file = FSInputFile(result['file_path'])
+            video_file = FSInputFile(result.file_path)
             
-            caption = "🎵 <b>TikTok Video</b>\n"
-            if info:
-                caption += (
-                    f"📹 {info['title']}\n"
-                    f"👤 {info['uploader']}\n"
-                    f"⏱️ {info['duration']} seconds"
-                )
+            caption = (
+                "🎵 <b>TikTok Video</b>\n"
+                f"📹 {result.title}\n"
+                f"👤 {result.uploader}\n"
+                f"⏱️ {result.duration} seconds"
+            )
             
-            async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
-                await message.reply_video(
-                    video=video_file,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
+            with record.phase("upload_time"):
+                async with ChatActionSender.upload_video(chat_id=message.chat.id, bot=message.bot):
+                    sent = await message.reply_video(
+                        video=video_file,
+                        caption=caption,
+                        parse_mode="HTML"
+                    )
+            await remember_sent_media(url, "video", sent, caption)
             
             await progress_msg.delete()
             await update_user_download_history(user_id)
-            
-            asyncio.create_task(cleanup_after_delay(result['file_path'], 1))
+            return sent.video.file_id, caption
         else:
-            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result['error']))
+            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result.error))
             
     except Exception as e:
+        record.outcome = Download.OUTCOME_ERROR
         await progress_msg.edit_text(get_text(user_id, 'unexpected_error', error=str(e)))
-    finally:
-        global current_downloads
-        current_downloads = max(0, current_downloads - 1)
 
 # Audio handlers
 @router.message(F.text.startswith(("🎵", "/audio")))
@@ -455,66 +653,72 @@ async def download_audio_handler(message: types.Message):
         await message.reply(get_text(user_id, 'invalid_url', platform="YouTube"))
         return
     
-    download_queue.append(lambda: handle_audio_download(message, url))
-    await message.reply(get_text(user_id, 'queue_added'))
+    await enqueue_download(message, url, "audio")
 
-async def handle_audio_download(message: types.Message, url: str):
+async def handle_audio_download(message: types.Message, url: str, workdir: Path, record: DownloadRecord, flight_key=None):
     """Handle audio download"""
     user_id = message.from_user.id
     
-    if not check_rate_limit(user_id):
-        await message.reply(get_text(user_id, 'audio_limit_exceeded'), parse_mode="HTML")
-        return
-    
     progress_msg = await message.reply(
         f"🎵 {get_text(user_id, 'audio_downloading')}\n⬜⬜⬜⬜⬜⬜⬜⬜⬜⬜ 0%"
     )
     
     try:
-        loop = asyncio.get_event_loop()
-        
         def progress_callback(progress):
-            asyncio.run_coroutine_threadsafe(
-                send_progress_update(message, progress_msg, progress, "YouTube Audio"),
-                loop
+            asyncio.create_task(
+                report_progress(message, progress_msg, progress, "YouTube Audio", flight_key)
             )
         
-        result = await asyncio.to_thread(
-            download_audio, 
-            url, 
-            user_id=user_id,
-            progress_hook=progress_callback
-        )
+        result = stored_media(url, "audio")
+        if result is None:
+            video = stored_media(url, "video")
+            with record.phase("download_time"):
+                if video is not None:
+                    # The video is already on disk, only the audio track is needed
+                    result = await get_backend("audio").run(
+                        convert_to_audio,
+                        video.file_path,
+                        output_dir=str(workdir),
+                        title=video.title
+                    )
+                else:
+                    result = await get_backend("audio").run(
+                        download_audio, 
+                        url, 
+                        output_dir=str(workdir),
+                        on_progress=progress_callback
+                    )
+            result = store_media(url, "audio", result)
+        record.media(result)
         
-        if result['success']:
+        if result.success:
             await progress_msg.edit_text(get_text(user_id, 'audio_uploading'))
             
-            audio_file = FSInputFile(result['file_path'])
+            audio_file = FSInputFile(result.file_path)
             
             caption = (
-                f"🎵 <b>{result['title']}</b>\n"
-                f"📊 {format_file_size(result['file_size'])}"
+                f"🎵 <b>{result.title}</b>\n"
+                f"📊 {format_file_size(result.file_size)}"
             )
             
-            async with ChatActionSender.upload_audio(chat_id=message.chat.id, bot=message.bot):
-                await message.reply_audio(
-                    audio=audio_file,
-                    caption=caption,
-                    parse_mode="HTML"
-                )
+            with record.phase("upload_time"):
+                async with ChatActionSender.upload_audio(chat_id=message.chat.id, bot=message.bot):
+                    sent = await message.reply_audio(
+                        audio=audio_file,
+                        caption=caption,
+                        parse_mode="HTML"
+                    )
+            await remember_sent_media(url, "audio", sent, caption)
             
             await progress_msg.delete()
             await update_user_download_history(user_id)
-            
-            asyncio.create_task(cleanup_after_delay(result['file_path'], 1))
+            return sent.audio.file_id, caption
         else:
-            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result['error']))
+            await progress_msg.edit_text(get_text(user_id, 'download_error', error=result.error))
             
     except Exception as e:
+        record.outcome = Download.OUTCOME_ERROR
         await progress_msg.edit_text(get_text(user_id, 'unexpected_error', error=str(e)))
-    finally:
-        global current_downloads
-        current_downloads = max(0, current_downloads - 1)
 
 # Other handlers
 @router.message(VideoTypeFilter(platform="likee"))
@@ -535,7 +739,47 @@ async def handle_unknown_url(message: types.Message):
         parse_mode="HTML"
     )
 
+# Job kind -> (handler, media format)
+JOB_KINDS = {
+    "youtube": (handle_youtube_download, "video"),
+    "instagram": (handle_instagram_download, "video"),
+    "tiktok": (handle_tiktok_download, "video"),
+    "audio": (handle_audio_download, "audio"),
+}
+# Platform names in the progress messages
+KIND_PLATFORMS = {
+    "youtube": "YouTube",
+    "instagram": "Instagram",
+    "tiktok": "TikTok",
+    "audio": "YouTube Audio",
+}
+
 # Start queue processing
-async def start_queue_processing():
-    """Start processing the download queue"""
-    asyncio.create_task(process_download_queue())
\ No newline at end of file
+async def start_queue_processing(bot: Bot):
+    """Start download workers, or connect to the broker if one is configured"""
+    global job_queue
+    if AMQP_URL:
+        job_queue = create_download_queue(AMQP_URL, prefetch=MAX_CONCURRENT_DOWNLOADS)
+        await job_queue.connect()
+        if is_in_memory(AMQP_URL):
+            # Jarayon ichidagi navbatni worker.py o'qiy olmaydi: ishlar shu jarayonda bajariladi
+            clear_stale_workdirs()
+            await job_queue.consume(lambda job: process_job(job, bot))
+    else:
+        clear_stale_workdirs()
+        download_pool.start()
+
+async def stop_queue_processing(drain_timeout: float = 30):
+    """Finish queued downloads and stop workers"""
+    global job_queue
+    if job_queue is not None:
+        await job_queue.close()
+        job_queue = None
+    await download_pool.stop(drain_timeout=drain_timeout)
+    await release_download_resources()
+
+async def release_download_resources():
+    """Close what downloads share: worker processes, HTTP session and the media store index"""
+    await shutdown_backends()
+    await close_session()
+    await media_store.close()
\ No newline at end of file
@@ -1,14 +1,13 @@
 from aiogram import Router, types
 from aiogram.filters import Command
-from utils.db.postgres import get_user
+from utils.profiles import UserProfile
 from utils.lang import lang
 
 router = Router()
 
 @router.message(Command("help"))
-async def bot_help(message: types.Message):
-    user = await get_user(message.from_user.id)
-    user_lang = user.lang if user and user.lang in lang else "uz"
+async def bot_help(message: types.Message, profile: UserProfile = None):
+    user_lang = profile.lang if profile and profile.lang in lang else "uz"
     message.answer_sticker("CAACAgEAAxkBAAEO3zxoa6_v5Nd-xTZP1vIVXwABupVbp9oAAqQBAAKMQrBFweNnmEiTT6o2BA")
     await message.answer(lang[user_lang]["help"], parse_mode="HTML")
 
@@ -1,31 +1,27 @@
-import instaloader
-from instaloader import Post
-import requests
 import os
-import time
-import math
+from data.config import INSTAGRAM_SESSIONS
+from utils.http_fetch import fetch_to_file
 
-# Instagram download function - to'g'irlangan
-# Instagram download function - optimizatsiyalangan
-def download_instagram_video(instagram_url, username, password, progress_callback=None, debug=False):
+def _fetch_video_url(loader, shortcode):
+    """Post video URL ini sessiya ichida olish (video bo'lmasa None)"""
+    from instaloader import Post
+
+    post = Post.from_shortcode(loader.context, shortcode)
+    return post.video_url if post.is_video else None
+
+def get_instagram_video(instagram_url, username, password, progress_callback=None, debug=False):
     """
-    Instagram URL dan video yuklab olish - Optimizatsiyalangan progress callback bilan
+    Instagram post/reel uchun to'g'ridan-to'g'ri video URL ni olish
+    
+    Returns:
+        dict: {'shortcode': str, 'video_url': str} yoki None
     """
+    # instaloader faqat birinchi Instagram ishida yuklanadi
+    from utils.instagram_sessions import get_session_pool, InstagramRateLimited
+
     try:
-        if debug:
-            print("🔧 Instaloader yaratilmoqda...")
-        
-        # Instaloader yaratish
-        L = instaloader.Instaloader(quiet=not debug)
-        
-        if debug:
-            print("🔐 Login qilinmoqda...")
-        
-        # Login
-        L.login(username, password)
-        
-        if debug:
-            print("✅ Login muvaffaqiyatli")
+        # Login qilingan sessiya puldan olinadi (sessiya fayli orqali saqlanadi)
+        sessions = get_session_pool(username, password, size=INSTAGRAM_SESSIONS)
         
         # Shortcode ajratib olish
         if '/p/' in instagram_url:
@@ -44,115 +40,52 @@ def download_instagram_video(instagram_url, username, password, progress_callbac
         
         # Progress: 0% - boshlash
         if progress_callback:
-            try:
-                progress_callback(0.0)
-            except:
-                pass
-        
-        time.sleep(2)
+            progress_callback(0.0)
         
-        # Post ma'lumotlarini olish
-        if debug:
-            print("📱 Post ma'lumotlari olinmoqda...")
-        
-        post = Post.from_shortcode(L.context, shortcode)
-        
-        if debug:
-            print("✅ Post ma'lumotlari olindi")
-        
-        # Progress: 25% - post ma'lumotlari olindi
-        if progress_callback:
-            try:
-                progress_callback(0.25)
-            except:
-                pass
+        video_url = sessions.call(lambda loader: _fetch_video_url(loader, shortcode))
         
         # Video tekshirish
-        if not post.is_video:
+        if not video_url:
             if debug:
                 print("❌ Bu post video emas")
             return None
         
-        if debug:
-            print("🎬 Video post tasdiqlandi")
-        
-        # Video URL va fayl nomi
-        video_url = post.video_url
-        filename = f"{shortcode}.mp4"
-        
-        if debug:
-            print(f"📺 Video URL: {video_url[:50]}...")
-            print(f"📁 Fayl nomi: {filename}")
-        
-        # Progress: 50% - video ma'lumotlari olindi
-        if progress_callback:
-            try:
-                progress_callback(0.5)
-            except:
-                pass
-        
-        # Video yuklab olish
-        if debug:
-            print("⬇️ Video yuklab olinmoqda...")
-        
-        response = requests.get(video_url, stream=True, timeout=60)
-        
-        if response.status_code != 200:
-            if debug:
-                print(f"❌ Video yuklab olishda xatolik: {response.status_code}")
-            return None
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        if debug:
-            print(f"📊 Jami hajm: {total_size} bytes")
-        
-        with open(filename, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    file.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    # Progress yangilash - faqat 75% gacha
-                    if progress_callback and total_size > 0:
-                        try:
-                            progress = min(0.75, 0.5 + (downloaded / total_size * 0.25))
-                            progress_callback(progress)
-                        except:
-                            pass
-        
-        if debug:
-            print("💾 Fayl yozildi")
-        
-        # Progress: 100% - tugallandi
+        # Progress: 25% - post ma'lumotlari olindi
         if progress_callback:
-            try:
-                progress_callback(1.0)
-            except:
-                pass
+            progress_callback(0.25)
         
-        # Fayl tekshirish
-        if os.path.exists(filename):
-            file_size = os.path.getsize(filename)
-            if debug:
-                print(f"📊 Fayl hajmi: {file_size / 1024:.2f} KB")
-            
-            if file_size > 1000:  # 1KB dan katta
-                if debug:
-                    print("✅ Fayl hajmi yetarli")
-                return filename
-            else:
-                if debug:
-                    print("❌ Fayl juda kichik")
-                os.remove(filename)
-                return None
-        else:
-            if debug:
-                print("❌ Fayl yaratilmadi")
-            return None
+        return {'shortcode': shortcode, 'video_url': video_url}
         
+    except InstagramRateLimited:
+        # Foydalanuvchiga sababini ko'rsatish uchun yuqoriga uzatiladi
+        raise
     except Exception as e:
         if debug:
             print(f"❌ Xatolik: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def download_instagram_video(video_info, output_dir, progress_callback=None):
+    """
+    Video faylni oqim bilan yuklab olish (aiohttp, 1 MB bo'laklar)
+    
+    Args:
+        video_info: get_instagram_video natijasi
+        output_dir: Faylni yozish papkasi
+        progress_callback: Progressni (0.25-1) qaytarish uchun funksiya
+    
+    Returns:
+        str: Fayl yo'li yoki None
+    """
+    file_path = os.path.join(output_dir, f"{video_info['shortcode']}.mp4")
+    
+    def on_progress(progress):
+        if progress_callback:
+            progress_callback(0.25 + progress * 0.75)
+    
+    file_size = await fetch_to_file(video_info['video_url'], file_path, progress=on_progress)
+    
+    # 1KB dan kichik fayl video emas
+    if file_size <= 1000:
+        os.remove(file_path)
+        return None
+    return file_path
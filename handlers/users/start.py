@@ -1,10 +1,14 @@
 from aiogram import Router, types
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
+from tortoise.exceptions import IntegrityError
 from loader import bot
 from app import logger
 from utils.lang import lang
-from utils.db.postgres import get_user, add_user, get_all_admins
+from utils.db.postgres import add_user, get_all_admins
+from utils.db.models import User
+from utils.profiles import UserProfile, profile_cache
+from utils.stats import bot_stats
 from states.select_lang import SelectLang
 from keyboards.reply.language import language_keyboard
 from middlewares.azolikni_tekshir import CallbackQuery, handle_subscription_check
@@ -16,12 +20,9 @@ async def process_subscription_check(callback: CallbackQuery):
     await handle_subscription_check(callback, bot)
 
 @router.message(CommandStart())
-async def do_start(message: types.Message, state: FSMContext):
+async def do_start(message: types.Message, state: FSMContext, profile: UserProfile = None):
     telegram_id = message.from_user.id
-    full_name = message.from_user.full_name
-    username = message.from_user.username or "unknown"
-
-    user = await get_user(telegram_id)
+    user = profile
 
     # 1. Foydalanuvchi bazada mavjud emasmi? Unda til tanlatsin.
     if not user:
@@ -36,13 +37,19 @@ async def do_start(message: types.Message, state: FSMContext):
         await message.answer(lang[user.lang]['banned'])
         return
 
+    # Botni blokdan chiqargan foydalanuvchi yana reklama oladi
+    if not user.is_active:
+        user.is_active = True
+        await User.filter(telegram_id=telegram_id).update(is_active=True)
+        bot_stats.user_reactivated()
+
     # 3. Aks holda start xabarini chiqarish
     await message.answer_sticker("CAACAgEAAxkBAAEO3y5oa65yaBgwDjJW3f956AibLKXEXAACpQIAAkb-8Ec467BfJxQ8djYE")
     await message.answer(lang[user.lang]['start'], parse_mode="HTML")
 
 
 @router.message(SelectLang.choose)
-async def process_language_choice(message: types.Message, state: FSMContext):
+async def process_language_choice(message: types.Message, state: FSMContext, profile: UserProfile = None):
     telegram_id = message.from_user.id
     full_name = message.from_user.full_name
     username = message.from_user.username or "unknown"
@@ -53,21 +60,25 @@ async def process_language_choice(message: types.Message, state: FSMContext):
     elif "English" in message.text:
         lang_code = "en"
 
-    user = await get_user(telegram_id)
+    created = False
+    if not profile:
+        try:
+            await add_user(full_name, telegram_id, username, lang=lang_code)
+            created = True
+        except IntegrityError:
+            # Boshqa bot nusxasi foydalanuvchini allaqachon qo'shgan: keshdagi "topilmadi" eskirgan
+            profile_cache.invalidate([telegram_id])
+            profile = await profile_cache.get(telegram_id)
 
-    if user:
-        user.lang = lang_code
-        await user.save()
+    if profile:
+        # Bazaga fon vazifasida yoziladi
+        profile_cache.set_lang(profile, lang_code)
         await message.answer_sticker("CAACAgEAAxkBAAEO3zpoa6-XPrqhnNv3nVtCbOCKbPwcZgACnwMAAonfWETOikC8ytx7RTYE")
         await message.answer("✅ Til muvaffaqiyatli o‘zgartirildi!", reply_markup=types.ReplyKeyboardRemove())
         await message.answer(lang[lang_code]["start"], parse_mode="HTML")
-    else:
-        # Yangi user — bazaga yozib qo‘yamiz
-        from utils.db.postgres import add_user, get_all_admins
-        await add_user(full_name, telegram_id, username)
-        user = await get_user(telegram_id)
-        user.lang = lang_code
-        await user.save()
+    elif created:
+        # Yangi user — bazaga yozildi
+        profile_cache.put(UserProfile(telegram_id=telegram_id, lang=lang_code))
 
         # Adminlarga xabar
         admins = await get_all_admins()
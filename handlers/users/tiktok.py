@@ -1,64 +1,54 @@
-import yt_dlp
+import math
 import os
 import tempfile
 from pathlib import Path
+from utils.tasks.extractor import MediaResult, extract_and_download
+from utils.tasks.workdir import OUTPUT_TEMPLATE
 
-def download_tiktok_video(url, output_dir="downloads"):
+def download_tiktok_video(url, output_dir="downloads", progress_callback=None):
     """
     TikTok videosini yuklab olish funksiyasi
     
     Args:
         url (str): TikTok video URL
         output_dir (str): Yuklab olinadigan papka
+        progress_callback: Progressni (0-1) qaytarish uchun funksiya
     
     Returns:
-        dict: {
-            'success': bool,
-            'file_path': str or None,
-            'error': str or None,
-            'video_info': dict or None
-        }
+        MediaResult: success, file_path, title, uploader, duration, error
     """
     try:
         # Papka yaratish
-        Path(output_dir).mkdir(exist_ok=True)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        
+        # Progress faqat 5% o'zgarganda yuboriladi (process backendda har biri pipe orqali o'tadi)
+        last_step = [-1]
+
+        def progress_hook(d):
+            if progress_callback and d['status'] == 'downloading':
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                if total:
+                    progress = min(d['downloaded_bytes'] / total, 1)
+                    step = math.floor(progress * 20)
+                    if step > last_step[0]:
+                        last_step[0] = step
+                        progress_callback(progress)
         
         # yt-dlp sozlamalari
         ydl_opts = {
-            'outtmpl': f'{output_dir}/%(title)s.%(ext)s',
+            'outtmpl': str(Path(output_dir) / OUTPUT_TEMPLATE),
             'format': 'best[height<=720]',  # 720p gacha
             'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            'progress_hooks': [progress_hook],
         }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Video ma'lumotlarini olish
-            info = ydl.extract_info(url, download=False)
-            
-            # Video yuklab olish
-            ydl.download([url])
-            
-            # Fayl nomini aniqlash
-            filename = ydl.prepare_filename(info)
-            
-            return {
-                'success': True,
-                'file_path': filename,
-                'error': None,
-                'video_info': {
-                    'title': info.get('title', 'Unknown'),
-                    'uploader': info.get('uploader', 'Unknown'),
-                    'duration': info.get('duration', 0),
-                    'view_count': info.get('view_count', 0)
-                }
-            }
+        # Ma'lumot olish va yuklab olish bitta extract_info bilan
+        return extract_and_download(url, ydl_opts)
             
     except Exception as e:
-        return {
-            'success': False,
-            'file_path': None,
-            'error': str(e),
-            'video_info': None
-        }
+        return MediaResult(success=False, error=str(e))
 
 def download_tiktok_to_temp(url):
     """
@@ -84,6 +74,8 @@ def get_tiktok_info(url):
     Returns:
         dict: video ma'lumotlari yoki None
     """
+    import yt_dlp
+
     try:
         ydl_opts = {
             'quiet': True,
@@ -1,22 +1,20 @@
-import yt_dlp
 import os
 from pathlib import Path
 import math
+import subprocess
 import time
+from utils.tasks.extractor import MediaResult, extract_and_download
+from utils.tasks.workdir import OUTPUT_TEMPLATE
 
 
 # YouTube download function - optimizatsiyalangan
-def download_video(url, user_id=None, progress_hook=None, quality='best'):
+def download_video(url, output_dir="downloads", progress_hook=None, quality='best'):
     """
     YouTube video yuklash funksiyasi - Optimizatsiyalangan progress hook bilan
     """
     try:
-        # Download papkasini yaratish
-        if user_id:
-            download_dir = Path(f"downloads/{user_id}")
-        else:
-            download_dir = Path("downloads")
-        
+        # Ishning o'z papkasi
+        download_dir = Path(output_dir)
         download_dir.mkdir(parents=True, exist_ok=True)
         
         # Progress hisobotlari uchun klass - optimizatsiyalangan
@@ -54,85 +52,35 @@ def download_video(url, user_id=None, progress_hook=None, quality='best'):
         # yt-dlp sozlamalari
         ydl_opts = {
             'format': f'{quality}[filesize<50M]/best',
-            'outtmpl': str(download_dir / '%(title)s.%(ext)s'),
+            'outtmpl': str(download_dir / OUTPUT_TEMPLATE),
             'quiet': True,
             'no_warnings': True,
             'progress_hooks': [progress_logger.progress_hook],
         }
         
-        # Video ma'lumotlarini olish
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            title = info.get('title', 'Unknown')
-            duration = info.get('duration', 0)
-            uploader = info.get('uploader', 'Unknown')
-            
-            # Uzunlik tekshiruvi (10 daqiqadan uzun bo'lmasin)
-            if duration > 600:  # 10 daqiqa
-                return {
-                    'success': False,
-                    'error': 'Video juda uzun (10 daqiqadan ortiq)',
-                    'duration': duration
-                }
-        
-        # Videoni yuklash
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        
-        # Yuklangan faylni topish
-        files = list(download_dir.glob('*'))
-        if not files:
-            return {
-                'success': False,
-                'error': 'Fayl yuklanmadi'
-            }
-        
-        # Eng oxirgi yuklangan fayl
-        file_path = max(files, key=lambda f: f.stat().st_mtime)
-        
-        return {
-            'success': True,
-            'file_path': str(file_path),
-            'title': title,
-            'duration': duration,
-            'uploader': uploader,
-            'file_size': file_path.stat().st_size
-        }
+        # Ma'lumot bir marta olinadi, uzunlik 10 daqiqadan oshmasin
+        return extract_and_download(url, ydl_opts, max_duration=600)
         
     except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+        return MediaResult(success=False, error=str(e))
 
 
 
-def download_audio(url, user_id=None, progress_hook=None):
+def download_audio(url, output_dir="downloads", progress_hook=None):
     """
     YouTube audio yuklash funksiyasi - Progress hook bilan
     
     Args:
         url: YouTube video URL
-        user_id: User ID (ixtiyoriy)
+        output_dir: Ishning papkasi
         progress_hook: Progressni qaytarish uchun funksiya
     
     Returns:
-        dict: {
-            'success': bool,
-            'file_path': str,
-            'title': str,
-            'file_size': int,
-            'error': str
-        }
+        MediaResult: success, file_path, title, file_size, error
     """
     try:
-        # Download papkasini yaratish
-        if user_id:
-            download_dir = Path(f"downloads/{user_id}")
-        else:
-            download_dir = Path("downloads")
-        
+        # Ishning o'z papkasi
+        download_dir = Path(output_dir)
         download_dir.mkdir(parents=True, exist_ok=True)
         
         # Progress hisobotlari uchun klass
@@ -160,7 +108,7 @@ def download_audio(url, user_id=None, progress_hook=None):
         # yt-dlp sozlamalari
         ydl_opts = {
             'format': 'bestaudio/best',
-            'outtmpl': str(download_dir / '%(title)s.%(ext)s'),
+            'outtmpl': str(download_dir / OUTPUT_TEMPLATE),
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'mp3',
@@ -171,36 +119,42 @@ def download_audio(url, user_id=None, progress_hook=None):
             'progress_hooks': [progress_logger.progress_hook],
         }
         
-        # Video ma'lumotlarini olish
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            title = info.get('title', 'Unknown')
-            
-            ydl.download([url])
-        
-        # MP3 faylini topish
-        files = list(download_dir.glob('*.mp3'))
-        if not files:
-            return {
-                'success': False,
-                'error': 'Audio fayl yuklanmadi'
-            }
-        
-        # Eng oxirgi yuklangan MP3
-        file_path = max(files, key=lambda f: f.stat().st_mtime)
-        
-        return {
-            'success': True,
-            'file_path': str(file_path),
-            'title': title,
-            'file_size': file_path.stat().st_size
-        }
+        # MP3 fayl yo'li post-processordan keyin info dict dan olinadi
+        return extract_and_download(url, ydl_opts)
         
     except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+        return MediaResult(success=False, error=str(e))
+
+
+def convert_to_audio(video_path, output_dir="downloads", title='Unknown'):
+    """
+    Diskdagi videodan MP3 ajratib olish (YouTube ga qayta murojaat qilmasdan)
+    
+    Args:
+        video_path: Video fayl yo'li
+        output_dir: Ishning papkasi
+        title: Audio nomi
+    
+    Returns:
+        MediaResult: success, file_path, title, file_size, error
+    """
+    try:
+        output_path = Path(output_dir) / 'media.mp3'
+        subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(video_path),
+             '-vn', '-acodec', 'libmp3lame', '-b:a', '192k', str(output_path)],
+            check=True,
+            capture_output=True,
+            timeout=300,
+        )
+        return MediaResult(
+            success=True,
+            file_path=str(output_path),
+            title=title,
+            file_size=output_path.stat().st_size
+        )
+    except Exception as e:
+        return MediaResult(success=False, error=str(e))
 
 
 def get_video_info(url):
@@ -213,6 +167,8 @@ def get_video_info(url):
     Returns:
         dict: Video ma'lumotlari yoki None
     """
+    import yt_dlp
+
     try:
         with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
             info = ydl.extract_info(url, download=False)
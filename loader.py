@@ -2,15 +2,20 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.utils.i18n import I18n, FSMI18nMiddleware
-from aiogram.fsm.storage.memory import MemoryStorage
+from utils.state import BackendStorage, state_backend
 from data.config import BOT_TOKEN
+from middlewares.request_limiter import request_limiter
+from middlewares.api_metrics import api_metrics
 
 
 
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+# app.py dagi bot bilan umumiy limit: ikkala sessiya bitta token ostida
+bot.session.middleware(request_limiter)
+bot.session.middleware(api_metrics)
 
 
-storage = MemoryStorage()
+storage = BackendStorage(state_backend)
 dispatcher = Dispatcher(storage=storage)
 
 
@@ -1,2 +1,5 @@
 from .throttling import ThrottlingMiddleware
-from .azolikni_tekshir import ChannelMembershipMiddleware
\ No newline at end of file
+from .azolikni_tekshir import ChannelMembershipMiddleware
+from .user_profile import UserProfileMiddleware
+from .request_limiter import RequestLimiter, request_limiter
+from .api_metrics import ApiMetricsMiddleware, api_metrics
@@ -0,0 +1,36 @@
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from utils.metrics import api_errors, api_requests
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Bot API so'rovlari davomiyligi va xatolari.
+
+    RequestLimiter dan keyin ulanadi: limiter kutishi hisobga kirmaydi,
+    har bir qayta urinish (masalan 429) alohida so'rov sifatida sanaladi.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ):
+        api_method = method.__api_method__
+        started = time.monotonic()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            api_errors.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            api_requests.observe(time.monotonic() - started, api_method)
+
+
+api_metrics = ApiMetricsMiddleware()
@@ -2,11 +2,99 @@ from aiogram.dispatcher.middlewares.base import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.exceptions import TelegramBadRequest
 from aiogram import Bot
-from utils.db.postgres import get_all_channels, get_all_admins
-from typing import Callable, Dict, Any, Awaitable, Union
+from aiogram.types import ChatMember
+from utils.db.postgres import (
+    get_all_channels, get_all_admins, get_channel_memberships, save_channel_membership
+)
+from utils.cache import TTLCache
+from data.config import MEMBERSHIP_CACHE_TTL, MEMBERSHIP_NEGATIVE_TTL, MEMBERSHIP_RECONCILE_AFTER
+from typing import Callable, Dict, Any, Awaitable, Iterable, Optional, Union
+import asyncio
 import logging
 
 
+# (user_id, channel_id) -> a'zomi. A'zo emaslar qisqa muddat saqlanadi:
+# foydalanuvchi kanalga qo'shilgach uzoq kutib qolmasin
+membership_cache = TTLCache(maxsize=100_000, ttl=MEMBERSHIP_CACHE_TTL)
+
+
+def is_chat_member(member: ChatMember) -> bool:
+    if member.status in ['left', 'kicked']:
+        return False
+    # Cheklangan (restricted) foydalanuvchi kanaldan chiqib ketgan bo'lishi mumkin
+    return getattr(member, 'is_member', True)
+
+
+def remember_membership(user_id: int, channel_id: int, is_member: bool):
+    membership_cache.set(
+        (user_id, channel_id), is_member,
+        ttl=None if is_member else MEMBERSHIP_NEGATIVE_TTL
+    )
+
+
+async def update_membership(user_id: int, channel_id: int, is_member: bool):
+    """chat_member yangilanishi yoki API javobini keshga va bazaga yozish"""
+    remember_membership(user_id, channel_id, is_member)
+    try:
+        await save_channel_membership(channel_id, user_id, is_member)
+    except Exception as e:
+        logging.error(f"A'zolikni saqlashda xatolik: {e}")
+
+
+async def fetch_membership(bot: Bot, user_id: int, channel_id: int) -> Optional[bool]:
+    """
+    Telegramdan a'zolikni so'rash: faqat bazada yozuv bo'lmaganda yoki u eskirganda.
+    Tekshirib bo'lmasa (bot kanalda emas va h.k.) None, u keshlanmaydi
+    """
+    try:
+        member = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
+    except TelegramBadRequest as e:
+        # Agar bot kanalga qo'shilmagan bo'lsa yoki boshqa xatolik bo'lsa
+        logging.error(f"Kanal {channel_id} tekshirishda xatolik: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Kutilmagan xatolik: {e}")
+        return None
+
+    is_member = is_chat_member(member)
+    await update_membership(user_id, channel_id, is_member)
+    return is_member
+
+
+async def get_memberships(
+    bot: Bot, user_id: int, channel_ids: Iterable[int], recheck_negative: bool = False
+) -> Dict[int, Optional[bool]]:
+    """
+    Avval jarayon keshi, keyin chat_member yangilanishlari yozadigan jadval,
+    ular bo'lmasa Telegram API (parallel). recheck_negative=True bo'lsa
+    "a'zo emas" natijalari to'g'ridan-to'g'ri API dan qayta so'raladi
+    """
+    result = {}
+    missing = []
+    for channel_id in channel_ids:
+        cached = membership_cache.get((user_id, channel_id))
+        if cached is None or (recheck_negative and not cached):
+            missing.append(channel_id)
+        else:
+            result[channel_id] = cached
+
+    if missing and not recheck_negative:
+        try:
+            stored = await get_channel_memberships(user_id, missing, MEMBERSHIP_RECONCILE_AFTER)
+        except Exception as e:
+            logging.error(f"A'zolikni bazadan o'qishda xatolik: {e}")
+            stored = {}
+        for channel_id, is_member in stored.items():
+            remember_membership(user_id, channel_id, is_member)
+            result[channel_id] = is_member
+        missing = [channel_id for channel_id in missing if channel_id not in stored]
+
+    if missing:
+        fetched = await asyncio.gather(*(fetch_membership(bot, user_id, channel_id) for channel_id in missing))
+        result.update(zip(missing, fetched))
+    return result
+
+
 # Middleware
 class ChannelMembershipMiddleware(BaseMiddleware):
     def __init__(self, bot: Bot, skip_admins: bool = True):
@@ -48,27 +136,12 @@ class ChannelMembershipMiddleware(BaseMiddleware):
             # Agar majburiy kanallar mavjud bo'lmasa, oddiy davom etish
             return await handler(event, data)
 
-        not_subscribed_channels = []
-        
-        for channel in channels:
-            try:
-                # Foydalanuvchining kanal a'zoligini tekshirish
-                member = await self.bot.get_chat_member(
-                    chat_id=channel.channel_id,
-                    user_id=user_id
-                )
-                
-                # Agar foydalanuvchi a'zo bo'lmasa yoki chiqib ketgan bo'lsa
-                if member.status in ['left', 'kicked']:
-                    not_subscribed_channels.append(channel)
-                    
-            except TelegramBadRequest as e:
-                # Agar bot kanalga qo'shilmagan bo'lsa yoki boshqa xatolik bo'lsa
-                logging.error(f"Kanal {channel.channel_username} tekshirishda xatolik: {e}")
-                continue
-            except Exception as e:
-                logging.error(f"Kutilmagan xatolik: {e}")
-                continue
+        memberships = await get_memberships(self.bot, user_id, [channel.channel_id for channel in channels])
+
+        # Tekshirib bo'lmagan kanallar (None) foydalanuvchini to'xtatmaydi
+        not_subscribed_channels = [
+            channel for channel in channels if memberships[channel.channel_id] is False
+        ]
 
         # Agar foydalanuvchi barcha kanallarga a'zo bo'lsa
         if not not_subscribed_channels:
@@ -135,24 +208,20 @@ async def check_user_subscription(bot: Bot, user_id: int, channel_id: int) -> bo
     """
     Foydalanuvchining bitta kanalga a'zoligini tekshirish
     """
-    try:
-        member = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
-        return member.status not in ['left', 'kicked']
-    except Exception as e:
-        logging.error(f"A'zolik tekshirishda xatolik: {e}")
-        return False
+    memberships = await get_memberships(bot, user_id, [channel_id])
+    return memberships[channel_id] is True
 
 async def check_user_all_subscriptions(bot: Bot, user_id: int) -> bool:
     """
     Foydalanuvchining barcha majburiy kanallarga a'zoligini tekshirish
     """
     channels = await get_all_channels()
-    
-    for channel in channels:
-        if not await check_user_subscription(bot, user_id, channel.channel_id):
-            return False
-    
-    return True
+
+    # "A'zolikni tekshirish" tugmasi bosilganda eski "a'zo emas" natijalariga ishonmaymiz
+    memberships = await get_memberships(
+        bot, user_id, [channel.channel_id for channel in channels], recheck_negative=True
+    )
+    return all(is_member is True for is_member in memberships.values())
 
 # Callback handler'lar
 async def handle_subscription_check(callback: CallbackQuery, bot: Bot):
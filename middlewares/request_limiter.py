@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Dict, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from utils.metrics import registry
+
+
+# Ustuvorlik sinflari: kichik son - oldin yuboriladi
+UPLOAD, MESSAGE, PROGRESS, BULK = range(4)
+PRIORITY_NAMES = {UPLOAD: "upload", MESSAGE: "message", PROGRESS: "progress", BULK: "bulk"}
+
+METHOD_PRIORITIES = {
+    "sendVideo": UPLOAD,
+    "sendAudio": UPLOAD,
+    "sendDocument": UPLOAD,
+    "sendPhoto": UPLOAD,
+    "sendAnimation": UPLOAD,
+    "sendVoice": UPLOAD,
+    "sendMediaGroup": UPLOAD,
+    "sendMessage": MESSAGE,
+    "sendSticker": MESSAGE,
+    "deleteMessage": MESSAGE,
+    "answerCallbackQuery": MESSAGE,
+    "editMessageText": PROGRESS,
+    "editMessageCaption": PROGRESS,
+    "sendChatAction": PROGRESS,
+    "copyMessage": BULK,
+    "forwardMessage": BULK,
+}
+
+# Chatdagi xabarlar limitiga kirmaydigan metodlar
+PER_CHAT_EXEMPT = {"sendChatAction", "deleteMessage", "answerCallbackQuery"}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_token(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class PriorityGate:
+    """
+    Token bucket, navbatda turganlar ustuvorlik tartibida o'tkaziladi.
+
+    Token bo'sh bo'lsa so'rov darhol o'tadi, aks holda heap ga tushadi va
+    bitta ``_pump`` vazifasi tokenlar paydo bo'lishi bilan ularni chiqaradi.
+    """
+
+    __slots__ = ("bucket", "blocked_until", "_waiters", "_seq", "_pump_task")
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.blocked_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._pump_task = None
+
+    @property
+    def idle(self) -> bool:
+        return not self._waiters and self.bucket.full and time.monotonic() >= self.blocked_until
+
+    def block(self, seconds: float):
+        """retry_after dan keyin shu darvozani vaqtincha yopish"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self, priority: int):
+        if not self._waiters and time.monotonic() >= self.blocked_until and self.bucket.try_take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self):
+        while self._waiters:
+            delay = max(self.blocked_until - time.monotonic(), self.bucket.time_until_token())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.bucket.try_take()
+            future.set_result(None)
+
+
+class RequestLimiter(BaseRequestMiddleware):
+    """
+    Bot API ga chiquvchi so'rovlar uchun umumiy cheklovchi.
+
+    Barcha chatlar uchun umumiy limit (~30 xabar/s), har bir chat uchun
+    alohida limit (shaxsiy chat ~1/s, guruh ~20/min) va ustuvorlik sinflari:
+    video yuborish progress tahriridan oldin o'tadi. ``TelegramRetryAfter``
+    kelsa ``retry_after`` + jitter kutib, so'rov qayta yuboriladi.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+    ):
+        self.global_gate = PriorityGate(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chats: Dict[Union[int, str], PriorityGate] = {}
+        self._created = 0
+        self.requests = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.wait_seconds = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.retries = 0
+        self.retry_after_seconds = 0.0
+
+    def _chat_gate(self, chat_id: Union[int, str]) -> PriorityGate:
+        gate = self._chats.get(chat_id)
+        if gate is None:
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            gate = PriorityGate(self.private_rate if is_private else self.group_rate, self.chat_burst)
+            self._chats[chat_id] = gate
+            self._created += 1
+            if self._created % 1000 == 0:
+                self._prune()
+        return gate
+
+    def _prune(self):
+        for chat_id in [chat_id for chat_id, gate in self._chats.items() if gate.idle]:
+            del self._chats[chat_id]
+
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "wait_seconds": dict(self.wait_seconds),
+            "retries": self.retries,
+            "retry_after_seconds": self.retry_after_seconds,
+            "tracked_chats": len(self._chats),
+        }
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ):
+        api_method = method.__api_method__
+        priority = METHOD_PRIORITIES.get(api_method)
+        if priority is None:
+            # getUpdates, getChatMember va shunga o'xshash so'rovlar cheklanmaydi
+            return await make_request(bot, method)
+
+        name = PRIORITY_NAMES[priority]
+        chat_id = getattr(method, "chat_id", None)
+        chat_gate = None
+        if chat_id is not None and api_method not in PER_CHAT_EXEMPT:
+            chat_gate = self._chat_gate(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            if chat_gate is not None:
+                await chat_gate.acquire(priority)
+            await self.global_gate.acquire(priority)
+            self.wait_seconds[name] += time.monotonic() - started
+            self.requests[name] += 1
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after + random.uniform(0.1, 1.0)
+                (chat_gate or self.global_gate).block(delay)
+                self.retries += 1
+                self.retry_after_seconds += delay
+                logging.warning(f"Flood wait: {api_method} chat={chat_id}, {delay:.1f} soniya kutiladi")
+                await asyncio.sleep(delay)
+
+
+request_limiter = RequestLimiter()
+
+registry.counter(
+    "telegram_limiter_requests_total", "Limiterdan o'tgan so'rovlar", ("priority",),
+    func=lambda: {(name,): count for name, count in request_limiter.requests.items()})
+registry.counter(
+    "telegram_limiter_wait_seconds_total", "Limiterda kutilgan vaqt", ("priority",),
+    func=lambda: {(name,): seconds for name, seconds in request_limiter.wait_seconds.items()})
+registry.counter(
+    "telegram_limiter_retries_total", "RetryAfter sababli qayta urinishlar",
+    func=lambda: request_limiter.retries)
+registry.gauge(
+    "telegram_limiter_tracked_chats", "Limiter kuzatayotgan chatlar soni",
+    func=lambda: len(request_limiter._chats))
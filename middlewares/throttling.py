@@ -1,28 +1,73 @@
-import time
+import logging
+from typing import Dict, NamedTuple, Optional
 
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
+
+from utils.lang import lang as LANGUAGES
+from utils.metrics import updates_dropped, updates_total
+from utils.profiles import profile_cache
+from utils.state import StateBackend
+
+
+class Limit(NamedTuple):
+    rate: float  # soniyasiga ruxsat etilgan so'rovlar (doimiy tezlik)
+    burst: int   # ketma-ket birdaniga ruxsat etilgan so'rovlar
+
+
+DEFAULT_LIMITS = {
+    "message": Limit(rate=2, burst=5),
+    "callback_query": Limit(rate=4, burst=8),
+}
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, slow_mode_delay=0.5):
-        self.user_timeouts = {}
-        self.slow_mode_delay = slow_mode_delay
+    """
+    Har bir foydalanuvchi va update turi uchun GCRA limiti (burst + doimiy tezlik).
+
+    Holat StateBackend da: memory backend idle yozuvlarni o'zi o'chiradi,
+    postgres backend esa limitni barcha bot nusxalari uchun umumiy qiladi.
+    Limitdan oshgan xabar jimgina tashlanadi, callback query ga esa tugma
+    yuklanib qolmasligi uchun qisqa javob beriladi.
+    """
+
+    def __init__(self, backend: StateBackend, limits: Optional[Dict[str, Limit]] = None):
+        self.backend = backend
+        self.limits = limits or DEFAULT_LIMITS
+        self.dropped = 0
         super(ThrottlingMiddleware, self).__init__()
 
+    async def allow(self, user_id: int, event_type: str) -> bool:
+        limit = self.limits.get(event_type)
+        if limit is None:
+            return True
+        result = await self.backend.gcra(f"throttle:{event_type}:{user_id}", 1 / limit.rate, limit.burst)
+        return result.allowed
+
+    @staticmethod
+    async def answer_throttled(query: CallbackQuery):
+        lang = profile_cache.lang(query.from_user.id, "uz")
+        try:
+            await query.answer(LANGUAGES.get(lang, LANGUAGES["uz"])["too_fast"])
+        except Exception as e:
+            logging.debug(f"Callback query ga javob berilmadi: {e}")
+
     async def __call__(self, handler, event: Message, data):
-        user_id = event.from_user.id
-        current_time = time.time()
-        
-        # Ushbu foydalanuvchining so'nggi so'rovi bo'yicha yozuv mavjudligini tekshirish
-        last_request_time = self.user_timeouts.get(user_id, 0)
-        if current_time - last_request_time < self.slow_mode_delay:
-            # Agar so'rovlar juda tez-tez bo'lsa, sekin rejimni yoqish
-            await event.reply("Juda ko'p so'rov! Biroz kuting.")
-            return
-        
-        else:
-            # Oxirgi so'rovning vaqtini yangilash
-            self.user_timeouts[user_id] = current_time
-            # Event ni handlerga o'tkazish
+        user = event.from_user
+        if user is None:
             return await handler(event, data)
+
+        update = data.get("event_update")
+        event_type = update.event_type if update is not None else "message"
+        updates_total.inc(event_type)
+        if not await self.allow(user.id, event_type):
+            # Javob yubormaymiz: har bir ortiqcha xabarga javob yana bitta API so'rovi
+            self.dropped += 1
+            updates_dropped.inc(event_type)
+            logging.debug(f"Throttled: {user.id} ({event_type})")
+            if isinstance(event, CallbackQuery):
+                await self.answer_throttled(event)
+            return
+
+        # Event ni handlerga o'tkazish
+        return await handler(event, data)
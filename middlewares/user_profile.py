@@ -0,0 +1,20 @@
+from typing import Any, Awaitable, Callable, Dict, Union
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+from utils.profiles import profile_cache
+
+
+class UserProfileMiddleware(BaseMiddleware):
+    """Handlerlarga data["profile"] orqali keshdagi profilni beradi (yangi foydalanuvchi uchun None)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Union[Message, CallbackQuery],
+        data: Dict[str, Any]
+    ) -> Any:
+        user = event.from_user
+        data["profile"] = await profile_cache.get(user.id) if user else None
+        return await handler(event, data)
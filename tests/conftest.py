@@ -0,0 +1,4 @@
+import os
+
+# data.config import paytida majburiy o'zgaruvchilar (.env bo'lmasa)
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
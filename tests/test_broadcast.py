@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from tortoise import Tortoise
+
+from utils import broadcast as broadcasts
+from utils.db.models import Broadcast
+
+
+def with_db(scenario):
+    async def run():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["utils.db.models"]})
+        await Tortoise.generate_schemas()
+        try:
+            return await scenario()
+        finally:
+            await Tortoise.close_connections()
+
+    return asyncio.run(run())
+
+
+def test_lease_is_held_by_one_instance(monkeypatch):
+    async def scenario():
+        broadcast = await Broadcast.create(from_chat_id=1, message_id=2)
+        assert await broadcasts.claim_lease(broadcast.id)
+        # Shu nusxa lease ni yangilay oladi
+        assert await broadcasts.claim_lease(broadcast.id)
+
+        monkeypatch.setattr(broadcasts, "INSTANCE_ID", "other:1")
+        assert not await broadcasts.claim_lease(broadcast.id)
+        await broadcasts.release_lease(broadcast.id)
+        await broadcast.refresh_from_db()
+        return broadcast.lease_owner
+
+    # Boshqa nusxa birovning lease ini bo'shata olmaydi
+    assert with_db(scenario) is not None
+
+
+def test_expired_lease_is_taken_over(monkeypatch):
+    async def scenario():
+        broadcast = await Broadcast.create(
+            from_chat_id=1, message_id=2, lease_owner="dead:1",
+            lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+        )
+        claimed = await broadcasts.claim_lease(broadcast.id)
+        await broadcast.refresh_from_db()
+        return claimed, broadcast.lease_owner
+
+    assert with_db(scenario) == (True, broadcasts.INSTANCE_ID)
+
+
+def test_released_lease_can_be_claimed_by_another_instance(monkeypatch):
+    async def scenario():
+        broadcast = await Broadcast.create(from_chat_id=1, message_id=2)
+        assert await broadcasts.claim_lease(broadcast.id)
+        await broadcasts.release_lease(broadcast.id)
+        monkeypatch.setattr(broadcasts, "INSTANCE_ID", "other:1")
+        return await broadcasts.claim_lease(broadcast.id)
+
+    assert with_db(scenario) is True
+
+
+def test_resume_while_paused_task_is_finishing_starts_a_new_task(monkeypatch):
+    runs = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fake_run(bot, broadcast_id):
+            runs.append(broadcast_id)
+            if len(runs) == 1:
+                await release.wait()
+
+        monkeypatch.setattr(broadcasts, "run_broadcast", fake_run)
+        broadcasts.spawn_broadcast(None, 7)
+        await asyncio.sleep(0)
+        # /reklama_resume eski vazifa hali tugamagan paytda
+        broadcasts.spawn_broadcast(None, 7)
+        assert runs == [7]
+
+        release.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert runs == [7, 7]
+    assert broadcasts._tasks == {} and broadcasts._respawn == set()
@@ -0,0 +1,48 @@
+import asyncio
+
+from utils.tasks.broker import InMemoryDownloadQueue, create_download_queue
+from utils.tasks.jobs import DownloadJob
+
+
+def make_job(**kwargs) -> DownloadJob:
+    defaults = dict(chat_id=1, message_id=2, user_id=3, url="https://youtu.be/dQw4w9WgXcQ", kind="youtube")
+    defaults.update(kwargs)
+    return DownloadJob(**defaults)
+
+
+async def run_queue(jobs, callback):
+    queue = create_download_queue("memory://", prefetch=2)
+    assert isinstance(queue, InMemoryDownloadQueue)
+    await queue.connect()
+    await queue.consume(callback)
+    for job in jobs:
+        await queue.publish(job)
+    await asyncio.wait_for(queue.join(), timeout=1)
+    await queue.close()
+    return queue
+
+
+def test_memory_queue_consumes_and_acks():
+    consumed = []
+
+    async def callback(job):
+        consumed.append(job)
+
+    jobs = [make_job(message_id=n) for n in range(3)]
+    queue = asyncio.run(run_queue(jobs, callback))
+
+    assert sorted(job.message_id for job in consumed) == [0, 1, 2]
+    assert consumed[0] == jobs[0]  # JSON orqali o'tib ham bir xil
+    assert queue.acked == 3
+    assert queue.dead_letters == []
+
+
+def test_memory_queue_dead_letters_failed_job():
+    async def callback(job):
+        raise RuntimeError("yuklab bo'lmadi")
+
+    job = make_job()
+    queue = asyncio.run(run_queue([job], callback))
+
+    assert queue.acked == 0
+    assert queue.dead_letters == [job]
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.media_id import parse_media_key
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42&utm_source=share",
+    "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "  https://YOUTU.BE/dQw4w9WgXcQ  ",
+])
+def test_youtube_links_share_one_key(url):
+    assert parse_media_key(url) == ("youtube", "dQw4w9WgXcQ")
+
+
+@pytest.mark.parametrize("url, key", [
+    ("https://www.instagram.com/reel/C1a2b3c4d5E/?igsh=xyz", ("instagram", "C1a2b3c4d5E")),
+    ("https://instagram.com/p/C1a2b3c4d5E/", ("instagram", "C1a2b3c4d5E")),
+    ("https://www.tiktok.com/@user/video/7312345678901234567?lang=en", ("tiktok", "7312345678901234567")),
+    ("https://vm.tiktok.com/ZMabcdef/", ("tiktok", "vm:ZMabcdef")),
+    ("https://vt.tiktok.com/ZSabcdef", ("tiktok", "vt:ZSabcdef")),
+])
+def test_other_platforms(url, key):
+    assert parse_media_key(url) == key
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=short",
+    "https://www.youtube.com/channel/UC123",
+    "https://youtu.be/",
+    "https://www.instagram.com/someuser/",
+    "https://www.tiktok.com/@user",
+    "https://example.com/video/123",
+    "not a url",
+])
+def test_unknown_links_have_no_key(url):
+    assert parse_media_key(url) is None
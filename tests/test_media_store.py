@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+from utils.media_store import MediaStore
+
+
+def make_file(tmp_path, name: str, size: int = 100) -> str:
+    path = tmp_path / "downloads" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_publish_moves_file_and_get_returns_it(tmp_path):
+    store = MediaStore(str(tmp_path / "store"), max_bytes=1000)
+    source = make_file(tmp_path, "a.mp4")
+    path = store.publish("youtube", "abc", "video", source, {"title": "T"})
+
+    assert not os.path.exists(source)
+    entry = store.get("youtube", "abc", "video")
+    assert entry["path"] == path and entry["size"] == 100 and entry["meta"] == {"title": "T"}
+    assert store.get("youtube", "abc", "audio") is None
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    store = MediaStore(str(tmp_path / "store"), max_bytes=250)
+    store.publish("youtube", "a", "video", make_file(tmp_path, "a.mp4"))
+    store.publish("youtube", "b", "video", make_file(tmp_path, "b.mp4"))
+    store.get("youtube", "a", "video")  # b endi eng eskisi
+    store.publish("youtube", "c", "video", make_file(tmp_path, "c.mp4"))
+
+    assert store.get("youtube", "b", "video") is None
+    assert store.get("youtube", "a", "video") is not None
+    assert store.total_bytes == 200
+
+
+def test_pinned_media_is_not_evicted(tmp_path):
+    store = MediaStore(str(tmp_path / "store"), max_bytes=250)
+    with store.pinned("youtube", "a"):
+        path = store.publish("youtube", "a", "video", make_file(tmp_path, "a.mp4"))
+        store.publish("youtube", "b", "video", make_file(tmp_path, "b.mp4"))
+        store.publish("youtube", "c", "video", make_file(tmp_path, "c.mp4"))
+        assert os.path.exists(path)
+        assert store.get("youtube", "b", "video") is None
+
+    store.publish("youtube", "d", "video", make_file(tmp_path, "d.mp4"))
+    assert not os.path.exists(path)
+
+
+def test_index_survives_reload(tmp_path):
+    root = str(tmp_path / "store")
+
+    async def publish():
+        store = MediaStore(root, max_bytes=1000, save_delay=60)
+        store.publish("tiktok", "1", "video", make_file(tmp_path, "1.mp4"))
+        await store.close()
+
+    asyncio.run(publish())
+    store = MediaStore(root, max_bytes=1000)
+    assert store.get("tiktok", "1", "video") is not None
+    assert store.total_bytes == 100
+
+
+def test_files_missing_from_index_are_removed_on_load(tmp_path):
+    root = str(tmp_path / "store")
+
+    async def crash_before_save():
+        store = MediaStore(root, max_bytes=1000, save_delay=60)
+        store.get("tiktok", "1", "video")
+        store.publish("tiktok", "1", "video", make_file(tmp_path, "1.mp4"))
+        store.publish("tiktok", "2", "video", make_file(tmp_path, "2.mp4"))
+        # close() chaqirilmaydi: kechiktirilgan yozish bekor bo'ladi
+
+    asyncio.run(crash_before_save())
+    assert len(os.listdir(os.path.join(root, "tiktok"))) == 2
+
+    store = MediaStore(root, max_bytes=1000)
+    assert store.get("tiktok", "1", "video") is None
+    assert store.total_bytes == 0
+    assert os.listdir(os.path.join(root, "tiktok")) == []
@@ -0,0 +1,53 @@
+from utils.metrics import Registry
+
+
+def test_counter_and_gauge_render_with_labels():
+    registry = Registry()
+    counter = registry.counter("bot_downloads_total", "Yuklashlar", ("platform", "outcome"))
+    counter.inc("youtube", "success")
+    counter.inc("youtube", "success", amount=2)
+    registry.gauge("bot_queue_depth", "Navbat", func=lambda: 4)
+
+    lines = registry.render().splitlines()
+    assert lines == [
+        "# HELP bot_downloads_total Yuklashlar",
+        "# TYPE bot_downloads_total counter",
+        'bot_downloads_total{platform="youtube",outcome="success"} 3',
+        "# HELP bot_queue_depth Navbat",
+        "# TYPE bot_queue_depth gauge",
+        "bot_queue_depth 4",
+    ]
+
+
+def test_gauge_func_with_label_dict_and_errors():
+    registry = Registry()
+    registry.gauge("chats", "Chatlar", ("kind",), func=lambda: {("private",): 2, ("group",): 1})
+    registry.gauge("broken", "Xato", func=lambda: 1 / 0)
+
+    text = registry.render()
+    assert 'chats{kind="private"} 2' in text
+    assert 'chats{kind="group"} 1' in text
+    # Hisoblanmagan metrika faqat sarlavha bilan chiqadi, qolganlari buzilmaydi
+    assert "# TYPE broken gauge\n" in text and "\nbroken " not in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("errors_total", "Xatolar", ("error",)).inc('Bad "request"\\n')
+    assert 'errors_total{error="Bad \\"request\\"\\\\n"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram("phase_seconds", "Bosqichlar", ("phase",), buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, "download")
+
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'phase_seconds_bucket{phase="download",le="1.0"} 2',
+        'phase_seconds_bucket{phase="download",le="5.0"} 3',
+        'phase_seconds_bucket{phase="download",le="+Inf"} 4',
+        'phase_seconds_sum{phase="download"} 14.5',
+        'phase_seconds_count{phase="download"} 4',
+    ]
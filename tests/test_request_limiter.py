@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import CopyMessage, EditMessageText, SendMessage, SendVideo
+
+from middlewares.request_limiter import BULK, PROGRESS, UPLOAD, PriorityGate, RequestLimiter
+
+
+def test_gate_releases_waiters_by_priority():
+    async def scenario():
+        gate = PriorityGate(rate=100, burst=1)
+        await gate.acquire(UPLOAD)  # yagona token sarflandi
+        order = []
+
+        async def request(priority, name):
+            await gate.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(request(BULK, "bulk")),
+            asyncio.create_task(request(PROGRESS, "progress")),
+            asyncio.create_task(request(UPLOAD, "upload")),
+        ]
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+        return order
+
+    assert asyncio.run(scenario()) == ["upload", "progress", "bulk"]
+
+
+def test_blocked_gate_waits():
+    async def scenario():
+        gate = PriorityGate(rate=100, burst=5)
+        gate.block(0.2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await gate.acquire(UPLOAD)
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.15
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda a, b: 0.0)
+
+
+def test_retry_after_is_retried(no_jitter):
+    method = SendMessage(chat_id=5, text="salom")
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        if len(calls) < 3:
+            raise TelegramRetryAfter(method=method, message="flood", retry_after=0)
+        return "ok"
+
+    limiter = RequestLimiter(max_retries=3)
+    assert asyncio.run(limiter(make_request, None, method)) == "ok"
+    assert len(calls) == 3
+    assert limiter.retries == 2
+    assert limiter.requests["message"] == 3
+
+
+def test_retry_after_gives_up_after_max_retries(no_jitter):
+    method = CopyMessage(chat_id=5, from_chat_id=1, message_id=2)
+
+    async def make_request(bot, method):
+        raise TelegramRetryAfter(method=method, message="flood", retry_after=0)
+
+    limiter = RequestLimiter(max_retries=2)
+    with pytest.raises(TelegramRetryAfter):
+        asyncio.run(limiter(make_request, None, method))
+    assert limiter.retries == 2
+    assert limiter.requests["bulk"] == 3
+
+
+def test_per_chat_limit_spaces_private_chat_requests():
+    async def scenario():
+        limiter = RequestLimiter(private_rate=10, chat_burst=1)
+
+        async def make_request(bot, method):
+            return None
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(3):
+            await limiter(make_request, None, EditMessageText(chat_id=7, message_id=1, text="50%"))
+        # Boshqa chat kutmaydi
+        other_started = loop.time()
+        await limiter(make_request, None, SendVideo(chat_id=8, video="file_id"))
+        return other_started - started, loop.time() - other_started
+
+    same_chat, other_chat = asyncio.run(scenario())
+    assert same_chat >= 0.15
+    assert other_chat < 0.05
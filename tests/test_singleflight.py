@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from handlers.users.download_media import LEADER_FAILED, FlightFailed, flight_result
+from utils.analytics import DownloadRecord
+from utils.db.models import Download
+from utils.singleflight import SingleFlight
+from utils.tasks.extractor import MediaResult
+
+
+def test_followers_get_the_leaders_result():
+    async def scenario():
+        inflight = SingleFlight()
+        leader = inflight.begin("youtube/abc/video")
+        followers = [inflight.get("youtube/abc/video") for _ in range(3)]
+        assert all(flight is leader for flight in followers)
+        assert len(inflight) == 1
+
+        inflight.resolve("youtube/abc/video", ("file_id", "caption"))
+        results = await asyncio.gather(*(flight.future for flight in followers))
+        return inflight, results
+
+    inflight, results = asyncio.run(scenario())
+    assert results == [("file_id", "caption")] * 3
+    assert len(inflight) == 0
+    assert inflight.get("youtube/abc/video") is None
+
+
+def test_new_flight_after_resolve():
+    async def scenario():
+        inflight = SingleFlight()
+        first = inflight.begin("key")
+        inflight.resolve("key", None)
+        second = inflight.begin("key")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is not second
+    assert first.future.done() and not second.future.done()
+
+
+def make_record() -> DownloadRecord:
+    return DownloadRecord(platform="youtube", user_id=1)
+
+
+def test_flight_result_passes_success_through():
+    assert flight_result(("file_id", "caption"), make_record()) == ("file_id", "caption")
+
+
+def test_media_failure_is_shared_with_followers():
+    record = make_record()
+    record.media(MediaResult(success=False, error="Video unavailable"))
+    assert flight_result(None, record) == FlightFailed("Video unavailable")
+
+
+@pytest.mark.parametrize("phase", ["extract_time", "download_time"])
+def test_download_error_is_shared_with_followers(phase):
+    record = make_record()
+    with pytest.raises(TimeoutError):
+        with record.phase(phase):
+            raise TimeoutError("Ish 300 soniyada tugamadi")
+    record.outcome = Download.OUTCOME_ERROR
+
+    assert flight_result(None, record) == FlightFailed("Ish 300 soniyada tugamadi")
+
+
+def test_upload_error_lets_a_follower_retry():
+    record = make_record()
+    with record.phase("download_time"):
+        pass
+    with pytest.raises(RuntimeError):
+        with record.phase("upload_time"):
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+    record.outcome = Download.OUTCOME_ERROR
+
+    assert flight_result(None, record) is LEADER_FAILED
+
+
+def test_error_outside_phases_lets_a_follower_retry():
+    record = make_record()
+    record.outcome = Download.OUTCOME_ERROR
+    assert flight_result(None, record) is LEADER_FAILED
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from utils.quota import HourlyQuota
+from utils.state import memory
+from utils.state.memory import MemoryStateBackend
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(memory.time, "monotonic", clock)
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_gcra_allows_burst_then_refills(clock):
+    backend = MemoryStateBackend()
+    results = [run(backend.gcra("throttle:message:1", 1.0, 3)).allowed for _ in range(4)]
+    assert results == [True, True, True, False]
+
+    clock.now += 1.0
+    assert run(backend.gcra("throttle:message:1", 1.0, 3)).allowed
+
+
+def test_gcra_check_only_does_not_consume(clock):
+    backend = MemoryStateBackend()
+    for _ in range(5):
+        assert run(backend.gcra("quota:1", 720, 5, cost=0)).remaining == 5
+    run(backend.gcra("quota:1", 720, 5))
+    assert run(backend.gcra("quota:1", 720, 5, cost=0)).remaining == 4
+
+
+def test_quota_survives_throttle_traffic(clock):
+    backend = MemoryStateBackend()
+    quota = HourlyQuota(backend, limit=2)
+
+    async def scenario():
+        await quota.consume(1)
+        await quota.consume(1)
+        assert not await quota.allowed(1)
+        # Ko'p foydalanuvchilarning throttling kalitlari tugamagan kvotani siqib chiqarmaydi
+        for user_id in range(100_001):
+            await backend.gcra(f"throttle:message:{user_id}", 0.5, 2)
+        return await quota.allowed(1)
+
+    assert run(scenario()) is False
+
+
+def test_expired_limits_are_evicted(clock):
+    backend = MemoryStateBackend()
+    run(backend.gcra("quota:1", 1800, 2))
+    for user_id in range(100):
+        run(backend.gcra(f"throttle:message:{user_id}", 0.5, 2))
+
+    clock.now += 10
+    run(backend.gcra("throttle:message:new", 0.5, 2))
+    assert set(backend._tats) == {"quota:1", "throttle:message:new"}
+
+    clock.now += 3600
+    run(backend.gcra("throttle:message:new", 0.5, 2))
+    assert set(backend._tats) == {"throttle:message:new"}
+    assert run(HourlyQuota(backend, limit=2).remaining(1)) == 2
+
+
+def test_values_expire_after_ttl(clock):
+    backend = MemoryStateBackend()
+    run(backend.set("pause", True, ttl=5))
+    run(backend.set("fsm:1", {"state": "ask"}))
+    assert run(backend.get("pause")) is True
+
+    clock.now += 5
+    assert run(backend.get("pause")) is None
+    assert run(backend.get("fsm:1")) == {"state": "ask"}
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from data.config import DOWNLOAD_LOG_BATCH_SIZE, DOWNLOAD_LOG_FLUSH_INTERVAL
+from utils.db.models import Download
+from utils.media_id import parse_media_key
+from utils.metrics import download_bytes, download_seconds, downloads_total, registry
+from utils.stats import bot_stats
+
+
+@dataclass
+class DownloadRecord:
+    """Bitta yuklab olishning o'lchovlari, downloads jadvalidagi bitta qator"""
+    platform: str
+    user_id: int
+    media_id: Optional[str] = None
+    queue_wait: float = 0.0
+    extract_time: float = 0.0
+    download_time: float = 0.0
+    upload_time: float = 0.0
+    file_size: int = 0
+    outcome: str = Download.OUTCOME_FAILED
+    # Jadvalga yozilmaydi: xato qaysi bosqichda chiqqani va uning matni
+    failed_phase = None
+    error = None
+
+    @classmethod
+    def for_job(cls, job) -> "DownloadRecord":
+        key = parse_media_key(job.url)
+        return cls(
+            platform=job.kind,
+            user_id=job.user_id,
+            media_id=key[1] if key else None,
+            queue_wait=max(time.time() - job.enqueued_at, 0.0),
+        )
+
+    @contextmanager
+    def phase(self, name: str):
+        """``extract_time``/``download_time``/``upload_time`` ga o'tgan vaqtni qo'shish"""
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.failed_phase, self.error = name, str(e)
+            raise
+        finally:
+            setattr(self, name, getattr(self, name) + time.monotonic() - started)
+
+    def media(self, result):
+        """Backend natijasi: hajm va extract vaqti (u download_time ichida o'lchangan)"""
+        self.file_size = result.file_size or 0
+        if not result.success:
+            self.error = result.error
+        if result.extract_time:
+            self.extract_time += result.extract_time
+            self.download_time = max(self.download_time - result.extract_time, 0.0)
+
+
+PHASES = ("queue_wait", "extract_time", "download_time", "upload_time")
+
+
+def observe(record: DownloadRecord):
+    """Prometheus metrikalari: natija, hajm va bosqichlar davomiyligi"""
+    downloads_total.inc(record.platform, record.outcome)
+    if record.outcome in Download.DELIVERED:
+        download_bytes.inc(record.platform, amount=record.file_size)
+    for phase in PHASES:
+        value = getattr(record, phase)
+        if value:
+            download_seconds.observe(value, record.platform, phase)
+
+
+class DownloadRecorder:
+    """
+    Yuklab olishlar analitikasi uchun bufer.
+
+    ``record`` hech narsani kutmaydi: qator xotiraga qo'shiladi va har
+    ``batch_size`` qatorda yoki har ``flush_interval`` soniyada bitta
+    ``bulk_create`` bilan bazaga yoziladi. Baza ishlamay qolsa bufer
+    ``max_pending`` dan oshmaydi, eng eski qatorlar tashlab yuboriladi.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[DownloadRecord] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+    def record(self, record: DownloadRecord):
+        bot_stats.download_recorded(record.platform, record.outcome)
+        observe(record)
+        self._pending.append(record)
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+        if len(self._pending) >= self.batch_size and (self._batch_task is None or self._batch_task.done()):
+            self._batch_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await Download.bulk_create([Download(**asdict(record)) for record in batch])
+        except Exception as e:
+            logging.error(f"Yuklashlar analitikasini saqlashda xatolik: {e}")
+            # Keyingi urinishda qayta yoziladi
+            self._pending = (batch + self._pending)[-self.max_pending:]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._batch_task is not None:
+            await asyncio.gather(self._batch_task, return_exceptions=True)
+        await self.flush()
+
+
+download_recorder = DownloadRecorder(
+    batch_size=DOWNLOAD_LOG_BATCH_SIZE,
+    flush_interval=DOWNLOAD_LOG_FLUSH_INTERVAL,
+    max_pending=DOWNLOAD_LOG_BATCH_SIZE * 20,
+)
+registry.counter(
+    "bot_download_log_dropped_total", "Baza ishlamagani sababli yozilmay qolgan analitika qatorlari",
+    func=lambda: download_recorder.dropped)
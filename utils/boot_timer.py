@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class BootTimer:
+    """Ishga tushish vaqtini bosqichlar bo'yicha o'lchash"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self, title: str = "Boot") -> str:
+        total = time.perf_counter() - self.started
+        parts = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        return f"{title}: {total:.2f}s ({parts})"
+
+
+# app.py birinchi import qilganda vaqt hisobi boshlanadi
+boot_timer = BootTimer()
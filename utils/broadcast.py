@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from tortoise.expressions import Q
+
+from data.config import BROADCAST_BATCH_SIZE, BROADCAST_CONCURRENCY
+from utils.db.models import Broadcast
+from utils.db.postgres import count_reachable_users, mark_users_inactive, select_user_ids_after
+from utils.profiles import profile_cache
+
+SENT, BLOCKED, FAILED = "sent", "blocked", "failed"
+
+STATUS_LABELS = {
+    Broadcast.STATUS_RUNNING: "▶️ Yuborilmoqda",
+    Broadcast.STATUS_PAUSED: "⏸ Pauzada",
+    Broadcast.STATUS_CANCELLED: "❌ Bekor qilindi",
+    Broadcast.STATUS_DONE: "✅ Yakunlandi",
+}
+
+_tasks: Dict[int, asyncio.Task] = {}
+# Eski vazifasi tugashi bilan qayta ishga tushiriladigan reklamalar
+_respawn: Set[int] = set()
+_stopping = False
+_watcher: Optional[asyncio.Task] = None
+
+# Har bir sahifadan keyin yangilanadi; nusxa o'chib qolsa shu vaqtdan keyin boshqasi oladi
+LEASE_SECONDS = 120
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+async def claim_lease(broadcast_id: int) -> bool:
+    """Reklamani shu nusxaga biriktirish (bitta UPDATE, bir vaqtda faqat bittasi yutadi)"""
+    now = datetime.now(timezone.utc)
+    claimed = await Broadcast.filter(
+        Q(lease_owner=None) | Q(lease_owner=INSTANCE_ID) | Q(lease_expires_at__lt=now),
+        id=broadcast_id,
+    ).update(lease_owner=INSTANCE_ID, lease_expires_at=now + timedelta(seconds=LEASE_SECONDS))
+    return claimed == 1
+
+
+async def release_lease(broadcast_id: int):
+    await Broadcast.filter(id=broadcast_id, lease_owner=INSTANCE_ID).update(
+        lease_owner=None, lease_expires_at=None
+    )
+
+
+def render_progress(broadcast: Broadcast) -> str:
+    done = broadcast.sent + broadcast.blocked + broadcast.failed
+    return (
+        f"📢 Reklama #{broadcast.id}: {STATUS_LABELS[broadcast.status]}\n\n"
+        f"✅ Yuborildi: {broadcast.sent}\n"
+        f"🚫 Botni bloklagan: {broadcast.blocked}\n"
+        f"⚠️ Xatolik: {broadcast.failed}\n"
+        f"📊 {done}/{broadcast.total}\n\n"
+        "/reklama_pause, /reklama_resume, /reklama_cancel"
+    )
+
+
+async def update_progress(bot: Bot, broadcast: Broadcast):
+    if not broadcast.status_message_id:
+        return
+    try:
+        await bot.edit_message_text(
+            text=render_progress(broadcast),
+            chat_id=broadcast.from_chat_id,
+            message_id=broadcast.status_message_id,
+        )
+    except TelegramBadRequest:
+        pass  # "message is not modified"
+
+
+async def deliver(bot: Bot, broadcast: Broadcast, telegram_id: int) -> str:
+    # RetryAfter ni sessiyadagi RequestLimiter qayta urinadi; bu yerga yetib kelsa
+    # urinishlar tugagan, foydalanuvchi xato deb hisoblanadi
+    try:
+        await bot.copy_message(
+            chat_id=telegram_id,
+            from_chat_id=broadcast.from_chat_id,
+            message_id=broadcast.message_id,
+        )
+        return SENT
+    except TelegramForbiddenError:
+        return BLOCKED
+    except TelegramBadRequest as e:
+        if "chat not found" in str(e).lower():
+            return BLOCKED
+        logging.info(f"🚫 Reklama yuborilmadi: {telegram_id}. Xatolik: {e}")
+        return FAILED
+    except Exception as e:
+        logging.info(f"🚫 Reklama yuborilmadi: {telegram_id}. Xatolik: {e}")
+        return FAILED
+
+
+async def run_broadcast(bot: Bot, broadcast_id: int):
+    """
+    Foydalanuvchilarni id bo'yicha sahifalab yuboradi. Har bir sahifadan keyin
+    hisoblagichlar va oxirgi id bazaga yoziladi, shuning uchun qayta ishga
+    tushganda reklama to'xtagan joyidan davom etadi. Bir nechta nusxada
+    reklamani faqat lease olgan nusxa yuboradi.
+    """
+    if not await claim_lease(broadcast_id):
+        logging.info(f"Reklama #{broadcast_id} boshqa nusxa tomonidan yuborilmoqda")
+        return
+    try:
+        await send_broadcast(bot, broadcast_id)
+    finally:
+        await release_lease(broadcast_id)
+
+
+async def send_broadcast(bot: Bot, broadcast_id: int):
+    broadcast = await Broadcast.get(id=broadcast_id)
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+    async def send_one(telegram_id: int):
+        async with semaphore:
+            return telegram_id, await deliver(bot, broadcast, telegram_id)
+
+    while not _stopping:
+        # Pauza va bekor qilish buyruqlari statusni bazada o'zgartiradi
+        await broadcast.refresh_from_db(fields=["status"])
+        if broadcast.status != Broadcast.STATUS_RUNNING:
+            break
+        if not await claim_lease(broadcast.id):
+            logging.warning(f"Reklama #{broadcast.id} lease yo'qotildi, boshqa nusxa davom ettiradi")
+            return
+
+        rows = await select_user_ids_after(broadcast.last_user_id, BROADCAST_BATCH_SIZE)
+        if not rows:
+            broadcast.status = Broadcast.STATUS_DONE
+            broadcast.finished_at = datetime.now(timezone.utc)
+            await broadcast.save(update_fields=["status", "finished_at"])
+            break
+
+        results = await asyncio.gather(*(send_one(telegram_id) for _, telegram_id in rows))
+        blocked = [telegram_id for telegram_id, result in results if result == BLOCKED]
+        await mark_users_inactive(blocked)
+        profile_cache.invalidate(blocked)
+
+        broadcast.last_user_id = rows[-1][0]
+        broadcast.sent += sum(1 for _, result in results if result == SENT)
+        broadcast.failed += sum(1 for _, result in results if result == FAILED)
+        broadcast.blocked += len(blocked)
+        await broadcast.save(update_fields=["last_user_id", "sent", "failed", "blocked"])
+        await update_progress(bot, broadcast)
+
+    await update_progress(bot, broadcast)
+    logging.info(f"Reklama #{broadcast.id}: {broadcast.status}, yuborildi {broadcast.sent}")
+
+
+def spawn_broadcast(bot: Bot, broadcast_id: int):
+    task = _tasks.get(broadcast_id)
+    if task is not None and not task.done():
+        # Masalan pauzadan keyin hali tugamagan vazifa: u tugagach qayta ishga
+        # tushiriladi, status "running" bo'lmasa yangi vazifa darhol chiqadi
+        _respawn.add(broadcast_id)
+        return
+    task = asyncio.create_task(run_broadcast(bot, broadcast_id))
+    task.add_done_callback(lambda t: _task_done(bot, broadcast_id, t))
+    _tasks[broadcast_id] = task
+
+
+def _task_done(bot: Bot, broadcast_id: int, task: asyncio.Task):
+    if _tasks.get(broadcast_id) is task:
+        del _tasks[broadcast_id]
+    if broadcast_id in _respawn:
+        _respawn.discard(broadcast_id)
+        if not _stopping:
+            spawn_broadcast(bot, broadcast_id)
+
+
+async def start_broadcast(bot: Bot, message) -> Broadcast:
+    broadcast = await Broadcast.create(
+        from_chat_id=message.chat.id,
+        message_id=message.message_id,
+        total=await count_reachable_users(),
+    )
+    status_message = await message.answer(render_progress(broadcast))
+    broadcast.status_message_id = status_message.message_id
+    await broadcast.save(update_fields=["status_message_id"])
+    spawn_broadcast(bot, broadcast.id)
+    return broadcast
+
+
+async def current_broadcast() -> Optional[Broadcast]:
+    """Oxirgi tugallanmagan (yuborilayotgan yoki pauzadagi) reklama"""
+    return await Broadcast.filter(
+        status__in=[Broadcast.STATUS_RUNNING, Broadcast.STATUS_PAUSED]
+    ).order_by("-id").first()
+
+
+async def pause_broadcast(broadcast: Broadcast):
+    broadcast.status = Broadcast.STATUS_PAUSED
+    await broadcast.save(update_fields=["status"])
+
+
+async def resume_broadcast(bot: Bot, broadcast: Broadcast):
+    broadcast.status = Broadcast.STATUS_RUNNING
+    await broadcast.save(update_fields=["status"])
+    spawn_broadcast(bot, broadcast.id)
+
+
+async def cancel_broadcast(bot: Bot, broadcast: Broadcast):
+    broadcast.status = Broadcast.STATUS_CANCELLED
+    broadcast.finished_at = datetime.now(timezone.utc)
+    await broadcast.save(update_fields=["status", "finished_at"])
+    if broadcast.id not in _tasks:
+        await update_progress(bot, broadcast)
+
+
+async def resume_running(bot: Bot):
+    now = datetime.now(timezone.utc)
+    for broadcast in await Broadcast.filter(
+        Q(lease_owner=None) | Q(lease_expires_at__lt=now), status=Broadcast.STATUS_RUNNING
+    ):
+        if broadcast.id in _tasks:
+            continue
+        logging.info(f"Reklama #{broadcast.id} {broadcast.last_user_id}-id dan davom ettirilmoqda")
+        spawn_broadcast(bot, broadcast.id)
+
+
+async def _watch_broadcasts(bot: Bot):
+    # Boshqa nusxa o'chib qolsa, uning lease muddati o'tgach reklamani shu nusxa oladi
+    while not _stopping:
+        await asyncio.sleep(LEASE_SECONDS)
+        try:
+            await resume_running(bot)
+        except Exception as e:
+            logging.error(f"Reklamalarni tekshirishda xatolik: {e}")
+
+
+async def resume_broadcasts(bot: Bot):
+    """Bot qayta ishga tushganda to'xtab qolgan reklamalarni davom ettirish"""
+    global _watcher
+    await resume_running(bot)
+    if _watcher is None or _watcher.done():
+        _watcher = asyncio.create_task(_watch_broadcasts(bot))
+
+
+async def stop_broadcasts(timeout: float = 30):
+    """
+    Joriy sahifa yuborib bo'linguncha kutamiz: status "running" bo'lib qoladi
+    va keyingi ishga tushishda davom ettiriladi.
+    """
+    global _stopping
+    _stopping = True
+    if _watcher is not None:
+        _watcher.cancel()
+    if _tasks:
+        await asyncio.wait(list(_tasks.values()), timeout=timeout)
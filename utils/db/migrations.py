@@ -0,0 +1,24 @@
+from tortoise import Tortoise, connections
+
+
+# generate_schemas faqat yangi jadvallarni yaratadi, mavjud jadvallarga
+# qo'shilgan ustunlar shu yerda idempotent SQL bilan qo'shiladi
+MIGRATIONS = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE",
+    # /stat dagi kunlik yangi foydalanuvchilar so'rovi uchun
+    "CREATE INDEX IF NOT EXISTS users_created_at_idx ON users (created_at)",
+    "ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(64)",
+    "ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ",
+]
+
+
+async def apply_migrations():
+    connection = connections.get("default")
+    for sql in MIGRATIONS:
+        await connection.execute_script(sql)
+
+
+async def migrate():
+    """Jadvallarni yaratish va ustun migratsiyalari: ``python app.py migrate``"""
+    await Tortoise.generate_schemas(safe=True)
+    await apply_migrations()
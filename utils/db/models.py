@@ -13,6 +13,8 @@ class User(models.Model):
     username = fields.CharField(max_length=50, null=True)
     is_admin = fields.BooleanField(default=False)
     is_banned = fields.BooleanField(default=False)
+    # Botni bloklagan foydalanuvchilar reklama yuborishda o'tkazib yuboriladi
+    is_active = fields.BooleanField(default=True)
     lang = fields.CharField(
         max_length=5,
         choices=LANGUAGE_CHOICES,
@@ -33,4 +35,106 @@ class Channels(models.Model):
     channel_id = fields.BigIntField(unique=True)
 
     class Meta:
-        table = "channels"
\ No newline at end of file
+        table = "channels"
+
+class ChannelMember(models.Model):
+    """Majburiy kanallardagi a'zolik, chat_member yangilanishlaridan yangilanadi"""
+    id = fields.IntField(pk=True)
+    channel_id = fields.BigIntField()
+    user_id = fields.BigIntField()
+    is_member = fields.BooleanField()
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "channel_members"
+        unique_together = (("channel_id", "user_id"),)
+
+class RateLimitState(models.Model):
+    """GCRA limitlari (throttling, kvotalar): TAT unix vaqtida, o'tib ketgan yozuvlar o'chiriladi"""
+    key = fields.CharField(max_length=255, pk=True)
+    tat = fields.FloatField(index=True)
+
+    class Meta:
+        table = "rate_limits"
+
+
+class StateEntry(models.Model):
+    """Bot nusxalari uchun umumiy kalit-qiymat holati (FSM, flaglar)"""
+    key = fields.CharField(max_length=255, pk=True)
+    value = fields.JSONField()
+    expires_at = fields.FloatField(null=True, index=True)
+
+    class Meta:
+        table = "state_entries"
+
+class MediaFile(models.Model):
+    """Telegramga yuklangan media fayllarining file_id keshi"""
+    id = fields.IntField(pk=True)
+    platform = fields.CharField(max_length=20)
+    media_id = fields.CharField(max_length=64)
+    format = fields.CharField(max_length=10)
+    file_id = fields.CharField(max_length=255)
+    caption = fields.TextField(null=True)
+    hits = fields.IntField(default=0)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    last_used_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    class Meta:
+        table = "media_files"
+        unique_together = (("platform", "media_id", "format"),)
+
+
+class Broadcast(models.Model):
+    """Reklama yuborish jarayoni va uning checkpointi"""
+    STATUS_RUNNING = "running"
+    STATUS_PAUSED = "paused"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_DONE = "done"
+
+    id = fields.IntField(pk=True)
+    from_chat_id = fields.BigIntField()
+    message_id = fields.BigIntField()
+    status_message_id = fields.BigIntField(null=True)
+    status = fields.CharField(max_length=10, default=STATUS_RUNNING, index=True)
+    # Keyset pagination uchun oxirgi ishlangan users.id
+    last_user_id = fields.IntField(default=0)
+    total = fields.IntField(default=0)
+    sent = fields.IntField(default=0)
+    failed = fields.IntField(default=0)
+    blocked = fields.IntField(default=0)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    finished_at = fields.DatetimeField(null=True)
+    # Reklamani qaysi bot nusxasi yuborayotgani: muddati o'tsa boshqa nusxa davom ettiradi
+    lease_owner = fields.CharField(max_length=64, null=True)
+    lease_expires_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "broadcasts"
+
+
+class Download(models.Model):
+    """Har bir yuklab olish so'rovi: vaqtlar (soniya), hajm va natija"""
+    OUTCOME_SUCCESS = "success"
+    OUTCOME_CACHED = "cached"        # file_id keshidan yuborildi
+    OUTCOME_COALESCED = "coalesced"  # boshqa foydalanuvchining bir xil yuklashini kutdi
+    OUTCOME_FAILED = "failed"
+    OUTCOME_ERROR = "error"
+    OUTCOME_RATE_LIMITED = "rate_limited"
+
+    DELIVERED = (OUTCOME_SUCCESS, OUTCOME_CACHED, OUTCOME_COALESCED)
+    FAILURES = (OUTCOME_FAILED, OUTCOME_ERROR)
+
+    id = fields.BigIntField(pk=True)
+    platform = fields.CharField(max_length=20)
+    media_id = fields.CharField(max_length=64, null=True)
+    user_id = fields.BigIntField(index=True)
+    queue_wait = fields.FloatField(default=0)
+    extract_time = fields.FloatField(default=0)
+    download_time = fields.FloatField(default=0)
+    upload_time = fields.FloatField(default=0)
+    file_size = fields.BigIntField(default=0)
+    outcome = fields.CharField(max_length=12)
+    created_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    class Meta:
+        table = "downloads"
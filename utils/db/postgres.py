@@ -1,6 +1,11 @@
 import os
-from tortoise import Tortoise
-from .models import User, Channels
+import time
+from datetime import timedelta
+from typing import Dict, Iterable
+from tortoise import Tortoise, connections, timezone
+from .models import User, Channels, ChannelMember, Download
+from utils.cache import TTLCache
+from data.config import ADMINS_CACHE_TTL, CHANNELS_CACHE_TTL
 
 DB_URL = os.getenv('DB_URL', 'DB bo\'lishi shart')
 
@@ -29,37 +34,105 @@ async def delete_admin(telegram_id: int) -> bool:
     except Exception as e:
         return False
 
+# Kanallar ro'yxati har bir xabarda kerak bo'ladi. O'zgartiruvchi funksiyalar
+# keshni o'zi tozalaydi, TTL esa boshqa jarayonlardagi o'zgarishlar uchun
+_lists_cache = TTLCache(maxsize=1, ttl=CHANNELS_CACHE_TTL)
+
+
+def invalidate_channels():
+    _lists_cache.pop('channels')
+
+
+# Admin ID lari startupda yuklanadi va /addadmin, /deladmin dan keyin yangilanadi.
+# Boshqa nusxalardagi o'zgarishlar uchun ADMINS_CACHE_TTL dan keyin qayta yuklanadi
+_admin_ids: frozenset = frozenset()
+_admins_loaded_at = 0.0
+
+
+async def admin_ids() -> frozenset:
+    if time.monotonic() - _admins_loaded_at >= ADMINS_CACHE_TTL:
+        try:
+            await refresh_admins()
+        except Exception:
+            # Baza vaqtincha ishlamasa oxirgi ma'lum ro'yxat ishlatiladi
+            pass
+    return _admin_ids
+
+
+async def refresh_admins() -> frozenset:
+    global _admin_ids, _admins_loaded_at
+    _admin_ids = frozenset(
+        await User.filter(is_admin=True).values_list('telegram_id', flat=True)
+    )
+    _admins_loaded_at = time.monotonic()
+    return _admin_ids
+
+
 # Database functions
 async def get_all_channels():
     """
     Barcha kanallar ro'yxatini olish
     """
-    return await Channels.all()
+    channels = _lists_cache.get('channels')
+    if channels is None:
+        channels = await Channels.all()
+        _lists_cache.set('channels', channels)
+    return channels
 
 async def add_channel(channel_username: str, channel_id: int):
     """
     Yangi kanal qo'shish
     """
-    return await Channels.create(
+    channel = await Channels.create(
         channel_username=channel_username,
         channel_id=channel_id
     )
+    invalidate_channels()
+    return channel
 
 async def delete_channel(channel_id: int):
     """
     Kanalni o'chirish
     """
-    return await Channels.filter(channel_id=channel_id).delete()
+    deleted = await Channels.filter(channel_id=channel_id).delete()
+    await ChannelMember.filter(channel_id=channel_id).delete()
+    invalidate_channels()
+    return deleted
+
+
+async def get_channel_memberships(user_id: int, channel_ids: Iterable[int], max_age: int) -> Dict[int, bool]:
+    """
+    Bazadagi a'zolik yozuvlari: {channel_id: is_member}, max_age soniyadan eskilari olinmaydi
+    """
+    rows = await ChannelMember.filter(
+        user_id=user_id,
+        channel_id__in=list(channel_ids),
+        updated_at__gte=timezone.now() - timedelta(seconds=max_age),
+    ).values_list('channel_id', 'is_member')
+    return dict(rows)
+
+
+async def save_channel_membership(channel_id: int, user_id: int, is_member: bool):
+    await ChannelMember.update_or_create(
+        defaults={'is_member': is_member},
+        channel_id=channel_id,
+        user_id=user_id,
+    )
 
 
 # Foydalanuvchi qo'shish
-async def add_user(full_name: str, telegram_id: int, username: str):
-    return await User.create(
+async def add_user(full_name: str, telegram_id: int, username: str, lang: str = 'uz'):
+    from utils.stats import bot_stats
+
+    user = await User.create(
         full_name=full_name,
         telegram_id=telegram_id,
         username=username,
+        lang=lang,
         is_banned=False  # default qiymat berib qo‘yamiz
     )
+    bot_stats.user_added()
+    return user
 
 
 async def get_user(telegram_id: int):
@@ -74,11 +147,91 @@ async def select_all_users():
     return await User.all().values_list('id', 'full_name', 'username', 'telegram_id', 'is_admin', 'is_banned', 'created_at')
 
 
+async def select_users_after(last_id: int, limit: int):
+    """
+    Eksport uchun keyingi sahifa: id bo'yicha keyset, select_all_users bilan bir xil ustunlar
+    """
+    return await User.filter(id__gt=last_id).order_by('id').limit(limit).values_list(
+        'id', 'full_name', 'username', 'telegram_id', 'is_admin', 'is_banned', 'created_at'
+    )
+
+
 async def select_all_user_ids():
     """
     Telegramga yuborish uchun faqat foydalanuvchilarning telegram_id ro‘yxati
     """
-    return await User.filter(is_banned=False).values_list('telegram_id', flat=True)
+    return await User.filter(is_banned=False, is_active=True).values_list('telegram_id', flat=True)
+
+
+async def select_user_ids_after(last_id: int, limit: int):
+    """
+    Reklama uchun keyingi foydalanuvchilar sahifasi: (id, telegram_id), id bo'yicha keyset
+    """
+    return await User.filter(
+        id__gt=last_id, is_banned=False, is_active=True
+    ).order_by('id').limit(limit).values_list('id', 'telegram_id')
+
+
+async def count_reachable_users() -> int:
+    return await User.filter(is_banned=False, is_active=True).count()
+
+
+async def mark_users_inactive(telegram_ids):
+    """
+    Botni bloklagan foydalanuvchilar keyingi reklamalarda o'tkazib yuboriladi
+    """
+    from utils.stats import bot_stats
+
+    if telegram_ids:
+        updated = await User.filter(telegram_id__in=list(telegram_ids), is_active=True).update(is_active=False)
+        bot_stats.users_deactivated(updated)
+
+
+USER_TOTALS_SQL = """
+SELECT COUNT(*) AS total,
+       COUNT(*) FILTER (WHERE is_banned) AS banned,
+       COUNT(*) FILTER (WHERE is_active AND NOT is_banned) AS active
+FROM users
+"""
+
+NEW_USERS_SQL = """
+SELECT created_at::date AS day, COUNT(*) AS joined
+FROM users
+WHERE created_at >= CURRENT_DATE - $1::int
+GROUP BY day
+"""
+
+
+DOWNLOADS_SQL = f"""
+SELECT platform,
+       COUNT(*) FILTER (WHERE outcome = ANY($2)) AS delivered,
+       COUNT(*) FILTER (WHERE outcome = ANY($3)) AS failed,
+       AVG(extract_time + download_time + upload_time)
+           FILTER (WHERE outcome = '{Download.OUTCOME_SUCCESS}') AS avg_seconds
+FROM downloads
+WHERE created_at >= CURRENT_DATE - $1::int
+GROUP BY platform
+"""
+
+
+async def download_stats(days: int = 7):
+    """
+    Platforma bo'yicha oxirgi ``days`` kundagi yuklashlar (downloads jadvalidan)
+    """
+    connection = connections.get("default")
+    return await connection.execute_query_dict(
+        DOWNLOADS_SQL, [days - 1, list(Download.DELIVERED), list(Download.FAILURES)]
+    )
+
+
+async def user_stats(days: int = 7):
+    """
+    /stat uchun agregatlar: jami/ban/faol sonlar va oxirgi ``days`` kunda qo'shilganlar
+    """
+    connection = connections.get("default")
+    totals = (await connection.execute_query_dict(USER_TOTALS_SQL))[0]
+    daily = await connection.execute_query_dict(NEW_USERS_SQL, [days - 1])
+    return totals, daily
 
 
 async def check_user_access(telegram_id: int, full_name: str, username: str) -> bool:
@@ -99,12 +252,16 @@ async def delete_all_users():
     """
     Barcha foydalanuvchilarni o'chirish
     """
+    from utils.stats import bot_stats
+
     await User.all().delete()
+    bot_stats.users_deleted()
+    await refresh_admins()
 
 
 async def get_all_admins():
     """
     Barcha adminlarni olish
     """
-    return await User.filter(is_admin=True).all().values_list('telegram_id', flat=True)
+    return await admin_ids()
 
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from typing import Callable, Optional
+
+import aiohttp
+
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Barcha yuklab olishlar uchun umumiy ulanishlar puli"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=60),
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def fetch_to_file(
+    url: str,
+    file_path: str,
+    progress: Optional[Callable[[float], None]] = None,
+    progress_interval: float = 1.0,
+    chunk_size: int = CHUNK_SIZE,
+    headers: Optional[dict] = None,
+) -> int:
+    """
+    URL dan faylni oqim bilan diskka yozish.
+
+    Ma'lumot avval ``<file_path>.part`` ga yoziladi va to'liq tushgandan
+    keyin nomi o'zgartiriladi. Progress ko'pi bilan ``progress_interval``
+    soniyada bir marta chaqiriladi.
+
+    Returns:
+        int: yozilgan baytlar soni
+    """
+    part_path = f"{file_path}.part"
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    downloaded = 0
+
+    try:
+        async with get_session().get(url, headers=headers) as response:
+            response.raise_for_status()
+            total = response.content_length or 0
+            last_report = time.monotonic()
+
+            # Disk ga yozish event loop ni to'smasligi uchun thread da, tarmoqdan
+            # kelgan mayda bo'laklar esa ``chunk_size`` gacha yig'ib yoziladi
+            file = await asyncio.to_thread(open, part_path, "wb")
+            try:
+                buffer = bytearray()
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    buffer += chunk
+                    downloaded += len(chunk)
+                    if len(buffer) >= chunk_size:
+                        await asyncio.to_thread(file.write, bytes(buffer))
+                        buffer.clear()
+
+                    if progress and total:
+                        now = time.monotonic()
+                        if now - last_report >= progress_interval:
+                            progress(downloaded / total)
+                            last_report = now
+                if buffer:
+                    await asyncio.to_thread(file.write, bytes(buffer))
+            finally:
+                await asyncio.to_thread(file.close)
+
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    if progress:
+        progress(1.0)
+    return downloaded
@@ -0,0 +1,161 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, TypeVar
+
+import instaloader
+from instaloader.exceptions import (
+    ConnectionException,
+    LoginRequiredException,
+    TooManyRequestsException,
+)
+
+
+T = TypeVar("T")
+
+
+class InstagramRateLimited(Exception):
+    """Instagram 429 qaytargandan keyingi kutish davri"""
+
+
+class _FailFastRateController(instaloader.RateController):
+    """429 da oqimni daqiqalab uxlatish o'rniga darhol xatolik berish"""
+
+    def handle_429(self, query_type: str) -> None:
+        raise TooManyRequestsException(f"429 Too Many Requests ({query_type})")
+
+
+class InstagramSessionPool:
+    """
+    Bir marta login qilingan Instagram sessiyalari puli.
+
+    Sessiya ``session_dir`` ga saqlanadi va qayta ishga tushganda fayldan
+    yuklanadi, shuning uchun har bir yuklab olishda login qilinmaydi.
+    Parallel ishlar uchun ``size`` tagacha alohida kontekst yaratiladi.
+    """
+
+    def __init__(self, username: str, password: str, size: int = 2,
+                 session_dir: str = "data/sessions", health_interval: float = 600):
+        self.username = username
+        self.password = password
+        self.size = size
+        self.session_dir = session_dir
+        self.health_interval = health_interval
+        self._available: "queue.Queue[instaloader.Instaloader]" = queue.Queue()
+        self._created = 0
+        self._checked_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self._backoff_until = 0.0
+        self._backoff_step = 0
+
+    @property
+    def session_file(self) -> str:
+        return os.path.join(self.session_dir, f"{self.username}.session")
+
+    def _new_loader(self) -> instaloader.Instaloader:
+        loader = instaloader.Instaloader(
+            quiet=True,
+            download_pictures=False,
+            download_video_thumbnails=False,
+            save_metadata=False,
+            rate_controller=lambda context: _FailFastRateController(context),
+        )
+        if os.path.exists(self.session_file):
+            try:
+                loader.load_session_from_file(self.username, self.session_file)
+                self._checked_at[id(loader)] = time.monotonic()
+                return loader
+            except Exception as e:
+                logging.warning(f"Instagram sessiya faylini yuklab bo'lmadi: {e}")
+        self._login(loader)
+        return loader
+
+    def _login(self, loader: instaloader.Instaloader):
+        with self._login_lock:
+            logging.info(f"Instagram: {self.username} sifatida login qilinmoqda")
+            loader.login(self.username, self.password)
+            os.makedirs(self.session_dir, exist_ok=True)
+            loader.save_session_to_file(self.session_file)
+            self._checked_at[id(loader)] = time.monotonic()
+
+    def _health_check(self, loader: instaloader.Instaloader):
+        """Sessiya hali ham amal qilishini vaqti-vaqti bilan tekshirish"""
+        if time.monotonic() - self._checked_at.get(id(loader), 0) < self.health_interval:
+            return
+        if loader.test_login() != self.username:
+            logging.info("Instagram sessiyasi eskirgan, qayta login qilinadi")
+            self._login(loader)
+        self._checked_at[id(loader)] = time.monotonic()
+
+    def _acquire(self, timeout: float) -> instaloader.Instaloader:
+        try:
+            return self._available.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._new_loader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._available.get(timeout=timeout)
+
+    def _on_rate_limited(self):
+        self._backoff_step = min(self._backoff_step + 1, 6)
+        delay = 30 * 2 ** (self._backoff_step - 1)
+        self._backoff_until = time.monotonic() + delay + random.uniform(0, delay / 4)
+        logging.warning(f"Instagram 429: {delay} soniya kutiladi")
+
+    def call(self, func: Callable[[instaloader.Instaloader], T], timeout: float = 60) -> T:
+        """
+        Sessiya bilan ``func(loader)`` ni bajarish.
+
+        Sessiya eskirgan bo'lsa bir marta qayta login qilinadi, 429 dan keyin
+        esa kutish davri tugaguncha ``InstagramRateLimited`` qaytariladi.
+        """
+        wait = self._backoff_until - time.monotonic()
+        if wait > 0:
+            raise InstagramRateLimited(f"Instagram cheklov qo'ydi, {int(wait)} soniyadan keyin urinib ko'ring")
+
+        loader = self._acquire(timeout)
+        try:
+            self._health_check(loader)
+            try:
+                result = func(loader)
+            except LoginRequiredException:
+                self._login(loader)
+                result = func(loader)
+            self._backoff_step = 0
+            return result
+        except TooManyRequestsException as e:
+            self._on_rate_limited()
+            raise InstagramRateLimited(str(e)) from e
+        except ConnectionException as e:
+            if "429" in str(e):
+                self._on_rate_limited()
+                raise InstagramRateLimited(str(e)) from e
+            raise
+        finally:
+            self._available.put(loader)
+
+
+_pools: Dict[str, InstagramSessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(username: str, password: str, size: int = 2) -> InstagramSessionPool:
+    """Har bir akkaunt uchun bitta umumiy pul"""
+    with _pools_lock:
+        pool = _pools.get(username)
+        if pool is None:
+            pool = _pools[username] = InstagramSessionPool(username, password, size=size)
+        return pool
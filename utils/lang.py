@@ -58,6 +58,7 @@ lang = {
             "Iltimos, biroz kutib turing."
         ),
         "queue_added": "🔄 Yuklab olish navbatga qo'shildi. Iltimos, kuting...",
+        "queue_position": "📍 Navbatdagi o'rningiz: {position}",
         "downloading": "{platform} yuklanmoqda...",
         "uploading": "📤 Video yuborilmoqda...",
         "download_complete": "✅ Yuklab olish yakunlandi!",
@@ -83,7 +84,8 @@ lang = {
             "⚠️ <b>Limit tugadi!</b>\n\n"
             "Siz 1 soat ichida 20 ta audio yuklab oldingiz.\n"
             "Iltimos, biroz kutib turing."
-        )
+        ),
+        "too_fast": "⏳ Juda tez! Biroz kuting."
     },
     
     "ru": {
@@ -145,6 +147,7 @@ lang = {
             "Пожалуйста, подождите немного."
         ),
         "queue_added": "🔄 Загрузка добавлена в очередь. Пожалуйста, ждите...",
+        "queue_position": "📍 Ваше место в очереди: {position}",
         "downloading": "Загрузка {platform}...",
         "uploading": "📤 Отправка видео...",
         "download_complete": "✅ Загрузка завершена!",
@@ -170,7 +173,8 @@ lang = {
             "⚠️ <b>Лимит исчерпан!</b>\n\n"
             "Вы загрузили 20 аудио за час.\n"
             "Пожалуйста, подождите немного."
-        )
+        ),
+        "too_fast": "⏳ Слишком быстро! Подождите немного."
     },
     
     "en": {
@@ -232,6 +236,7 @@ lang = {
             "Please wait a bit."
         ),
         "queue_added": "🔄 Download added to queue. Please wait...",
+        "queue_position": "📍 Your position in queue: {position}",
         "downloading": "Downloading {platform}...",
         "uploading": "📤 Uploading video...",
         "download_complete": "✅ Download completed!",
@@ -257,6 +262,7 @@ lang = {
             "⚠️ <b>Rate limit exceeded!</b>\n\n"
             "You have downloaded 20 audio files in the past hour.\n"
             "Please wait a bit."
-        )
+        ),
+        "too_fast": "⏳ Too fast! Please wait a moment."
     }
 }
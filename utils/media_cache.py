@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from tortoise.expressions import F
+from tortoise.timezone import now
+
+from data.config import MEDIA_CACHE_TTL, MEDIA_CACHE_MAX_ROWS, MEDIA_CACHE_HOT_SIZE
+from utils.cache import TTLCache
+from utils.db.models import MediaFile
+
+
+class MediaFileCache:
+    """
+    (platforma, media_id, format) -> Telegram file_id keshi.
+
+    Oldida jarayon ichidagi issiq LRU qatlami turadi, orqasida esa
+    ``media_files`` jadvali. Yozuvlar ``ttl`` dan keyin eskiradi, jadval
+    ``max_rows`` dan oshsa eng uzoq ishlatilmaganlari o'chiriladi.
+    """
+
+    def __init__(self, ttl: int, max_rows: int, hot_size: int, evict_every: int = 200):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.evict_every = evict_every
+        self._hot = TTLCache(maxsize=hot_size, ttl=min(ttl, 3600))
+        self._puts = 0
+
+    async def get(self, platform: str, media_id: str, fmt: str) -> Optional[MediaFile]:
+        key = (platform, media_id, fmt)
+        entry = self._hot.get(key)
+        if entry is not None:
+            return entry
+
+        entry = await MediaFile.get_or_none(platform=platform, media_id=media_id, format=fmt)
+        if entry is None:
+            return None
+
+        current = now()
+        if entry.created_at + timedelta(seconds=self.ttl) <= current:
+            await MediaFile.filter(id=entry.id).delete()
+            return None
+
+        await MediaFile.filter(id=entry.id).update(hits=F("hits") + 1, last_used_at=current)
+        remaining = (entry.created_at + timedelta(seconds=self.ttl) - current).total_seconds()
+        self._hot.set(key, entry, ttl=min(self._hot.ttl, remaining))
+        return entry
+
+    async def put(self, platform: str, media_id: str, fmt: str, file_id: str, caption: Optional[str] = None):
+        entry, _ = await MediaFile.update_or_create(
+            defaults={"file_id": file_id, "caption": caption, "created_at": now(), "last_used_at": now()},
+            platform=platform, media_id=media_id, format=fmt,
+        )
+        self._hot.set((platform, media_id, fmt), entry)
+
+        self._puts += 1
+        if self._puts % self.evict_every == 0:
+            asyncio.create_task(self.evict())
+
+    async def forget(self, platform: str, media_id: str, fmt: str):
+        """Yaroqsiz bo'lib qolgan file_id ni o'chirish"""
+        self._hot.pop((platform, media_id, fmt))
+        await MediaFile.filter(platform=platform, media_id=media_id, format=fmt).delete()
+
+    async def evict(self):
+        """Eskirgan va ortiqcha yozuvlarni o'chirish"""
+        try:
+            await MediaFile.filter(created_at__lt=now() - timedelta(seconds=self.ttl)).delete()
+            extra = await MediaFile.all().count() - self.max_rows
+            if extra > 0:
+                ids = await MediaFile.all().order_by("last_used_at").limit(extra).values_list("id", flat=True)
+                await MediaFile.filter(id__in=list(ids)).delete()
+        except Exception as e:
+            logging.error(f"Media keshini tozalashda xatolik: {e}")
+
+
+media_cache = MediaFileCache(ttl=MEDIA_CACHE_TTL, max_rows=MEDIA_CACHE_MAX_ROWS, hot_size=MEDIA_CACHE_HOT_SIZE)
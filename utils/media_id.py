@@ -0,0 +1,59 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+
+_YOUTUBE_ID = re.compile(r"^[\w-]{11}$")
+_INSTAGRAM_PATH = re.compile(r"/(?:p|reel|reels|tv)/([\w-]+)")
+_TIKTOK_VIDEO = re.compile(r"/video/(\d+)")
+
+
+def parse_media_key(url: str) -> Optional[Tuple[str, str]]:
+    """
+    URL dan kanonik (platforma, media_id) juftligini ajratib olish.
+
+    Bir xil video turli ko'rinishdagi havolalar bilan kelsa ham
+    (``youtu.be``, ``/shorts/``, ``?v=``, UTM parametrlari) kalit bir xil bo'ladi.
+
+    Returns:
+        tuple yoki None: ``("youtube", "dQw4w9WgXcQ")`` kabi
+    """
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+
+    host = (parsed.netloc or "").lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path or ""
+
+    if host == "youtu.be":
+        media_id = path.strip("/").split("/")[0]
+        return ("youtube", media_id) if _YOUTUBE_ID.match(media_id) else None
+
+    if host.endswith("youtube.com"):
+        query_id = parse_qs(parsed.query).get("v", [""])[0]
+        if _YOUTUBE_ID.match(query_id):
+            return "youtube", query_id
+        parts = [part for part in path.split("/") if part]
+        if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+            media_id = parts[1]
+            return ("youtube", media_id) if _YOUTUBE_ID.match(media_id) else None
+        return None
+
+    if host.endswith("instagram.com"):
+        match = _INSTAGRAM_PATH.search(path)
+        return ("instagram", match.group(1)) if match else None
+
+    if host.endswith("tiktok.com"):
+        match = _TIKTOK_VIDEO.search(path)
+        if match:
+            return "tiktok", match.group(1)
+        # vm.tiktok.com/XXXX kabi qisqa havolalar ham barqaror kod
+        if host in ("vm.tiktok.com", "vt.tiktok.com"):
+            code = path.strip("/").split("/")[0]
+            return ("tiktok", f"{host[:2]}:{code}") if code else None
+        return None
+
+    return None
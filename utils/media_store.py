@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from data.config import MEDIA_STORE_DIR, MEDIA_STORE_MAX_BYTES
+
+
+class MediaStore:
+    """
+    Yuklab olingan fayllarning diskdagi keshi (platforma va media_id bo'yicha).
+
+    Umumiy hajm ``max_bytes`` dan oshsa eng uzoq ishlatilmagan fayllar
+    o'chiriladi. Indeks ``index.json`` da saqlanadi, shuning uchun kesh
+    qayta ishga tushirishdan keyin ham saqlanib qoladi. Bitta papkadan
+    faqat bitta jarayon foydalanishi kerak.
+
+    Ishlatilayotgan (``pinned``) fayllar o'chirilmaydi. Indeks har
+    ``publish`` da emas, ``save_delay`` soniyada bir marta thread da yoziladi.
+    """
+
+    def __init__(self, root: str, max_bytes: int, save_delay: float = 5.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.save_delay = save_delay
+        self.index_path = os.path.join(root, "index.json")
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._total = 0
+        self._loaded = False
+        # "platform/media_id" -> shu media bilan ishlayotgan ishlar soni
+        self._pins: Counter = Counter()
+        self._save_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(platform: str, media_id: str, fmt: str) -> str:
+        return f"{platform}/{media_id}/{fmt}"
+
+    def _load(self):
+        self._loaded = True
+        entries = []
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                entries = json.load(file).get("entries", [])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Media ombori indeksini o'qib bo'lmadi: {e}")
+
+        for entry in sorted(entries, key=lambda item: item.get("last_used", 0)):
+            if os.path.exists(entry["path"]):
+                self._entries[entry["key"]] = entry
+                self._total += entry["size"]
+        self._remove_orphans()
+        logging.info(f"Media ombori: {len(self._entries)} ta fayl, {self._total // (1024 * 1024)} MB")
+
+    def _remove_orphans(self):
+        """
+        Indeksda yo'q fayllarni o'chirish: indeks yozilishidan oldin jarayon
+        to'xtab qolsa ular hajm chegarasiga kirmay diskda qolib ketardi
+        """
+        known = {os.path.normpath(entry["path"]) for entry in self._entries.values()}
+        known.add(os.path.normpath(self.index_path))
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.normpath(os.path.join(directory, name))
+                if path in known:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    logging.error(f"Media omboridagi ortiqcha faylni o'chirib bo'lmadi: {e}")
+        if removed:
+            logging.info(f"Media ombori: indeksda yo'q {removed} ta fayl o'chirildi")
+
+    def _snapshot(self) -> list:
+        return [dict(entry) for entry in self._entries.values()]
+
+    def _write(self, entries: list):
+        """Indeksni atomar yozish"""
+        os.makedirs(self.root, exist_ok=True)
+        part_path = f"{self.index_path}.part"
+        with open(part_path, "w", encoding="utf-8") as file:
+            json.dump({"entries": entries}, file, ensure_ascii=False)
+        os.replace(part_path, self.index_path)
+
+    def _schedule_save(self):
+        if self._save_task is not None and not self._save_task.done():
+            return
+        try:
+            self._save_task = asyncio.get_running_loop().create_task(self._delayed_save())
+        except RuntimeError:
+            # Event loop yo'q (masalan skriptdan chaqirilgan): darhol yoziladi
+            self._write(self._snapshot())
+
+    async def _delayed_save(self):
+        await asyncio.sleep(self.save_delay)
+        await self.save()
+
+    async def save(self):
+        """Indeksni event loop ni to'sib qo'ymasdan yozish"""
+        if not self._loaded:
+            return
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except Exception as e:
+            logging.error(f"Media ombori indeksini yozib bo'lmadi: {e}")
+
+    async def close(self):
+        """Kutilayotgan yozishni bekor qilib, indeksni oxirgi marta saqlash"""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            try:
+                await self._save_task
+            except asyncio.CancelledError:
+                pass
+        self._save_task = None
+        await self.save()
+
+    @contextmanager
+    def pinned(self, platform: str, media_id: str):
+        """Blok ichida media fayllari (barcha formatlar) evict qilinmaydi"""
+        pin = f"{platform}/{media_id}"
+        self._pins[pin] += 1
+        try:
+            yield
+        finally:
+            self._pins[pin] -= 1
+            if self._pins[pin] <= 0:
+                del self._pins[pin]
+
+    def _is_pinned(self, key: str) -> bool:
+        return key.rsplit("/", 1)[0] in self._pins
+
+    def get(self, platform: str, media_id: str, fmt: str) -> Optional[dict]:
+        """Fayl omborda bo'lsa uning yozuvini qaytarish: path, size, meta"""
+        if not self._loaded:
+            self._load()
+        key = self._key(platform, media_id, fmt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(entry["path"]):
+            self._drop(key)
+            return None
+        entry["last_used"] = time.time()
+        self._entries.move_to_end(key)
+        return entry
+
+    def publish(self, platform: str, media_id: str, fmt: str, source_path: str, meta: Optional[dict] = None) -> str:
+        """
+        Faylni omborga ko'chirish: avval ``.part`` ga, keyin nomini o'zgartirish.
+
+        Returns:
+            str: faylning ombordagi yangi yo'li
+        """
+        if not self._loaded:
+            self._load()
+        key = self._key(platform, media_id, fmt)
+        safe_id = re.sub(r"[^\w.-]", "_", media_id)
+        extension = os.path.splitext(source_path)[1]
+        directory = os.path.join(self.root, platform)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{safe_id}.{fmt}{extension}")
+
+        shutil.move(source_path, f"{path}.part")
+        os.replace(f"{path}.part", path)
+
+        if key in self._entries:
+            self._drop(key, remove_file=False)
+        size = os.path.getsize(path)
+        self._entries[key] = {"key": key, "path": path, "size": size, "meta": meta or {}, "last_used": time.time()}
+        self._total += size
+
+        self._evict(keep=key)
+        self._schedule_save()
+        return path
+
+    def _drop(self, key: str, remove_file: bool = True):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total -= entry["size"]
+        if remove_file:
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep: str):
+        if self._total <= self.max_bytes:
+            return
+        # Eng eskisidan boshlab, ishlatilayotganlarini tashlab o'tib
+        for key in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if key == keep or self._is_pinned(key):
+                continue
+            self._drop(key)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+
+media_store = MediaStore(root=MEDIA_STORE_DIR, max_bytes=MEDIA_STORE_MAX_BYTES)
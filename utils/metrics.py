@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from aiohttp import web
+
+LabelValues = Tuple[str, ...]
+
+# Soniyalar uchun standart chegaralar: Telegram so'rovlari ~0.05 s, yuklashlar daqiqalab
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Gauge(Metric):
+    """
+    Joriy qiymat. ``func`` berilsa qiymat faqat /metrics so'ralganda hisoblanadi:
+    son yoki {label qiymatlari: son} lug'atini qaytaradi.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 func: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        values = self._values
+        if self.func is not None:
+            try:
+                result = self.func()
+            except Exception as e:
+                logging.error(f"Metrika {self.name} hisoblanmadi: {e}")
+                return []
+            values = result if isinstance(result, dict) else {(): result}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Counter(Gauge):
+    """O'sib boruvchi son. ``inc`` bitta dict amali, hot path uchun yetarlicha arzon"""
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label qiymatlari -> [har bir chegara uchun son (+Inf bilan), yig'indi]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), func=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, func))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), func=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, func))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition formati (0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.header()
+            lines += metric.samples()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Update lar (throttling middleware)
+updates_total = registry.counter(
+    "bot_updates_total", "Qabul qilingan update lar", ("type",))
+updates_dropped = registry.counter(
+    "bot_updates_dropped_total", "Throttling sababli tashlangan update lar", ("type",))
+
+# Yuklab olishlar (utils.analytics dagi recorder)
+downloads_total = registry.counter(
+    "bot_downloads_total", "Yuklab olish so'rovlari natijasi bo'yicha", ("platform", "outcome"))
+download_bytes = registry.counter(
+    "bot_download_bytes_total", "Yuborilgan fayllar hajmi (bayt)", ("platform",))
+download_seconds = registry.histogram(
+    "bot_download_phase_seconds", "Yuklab olish bosqichlari davomiyligi", ("platform", "phase"))
+
+# Telegram Bot API (bot sessiyasi middleware i)
+api_requests = registry.histogram(
+    "telegram_api_request_seconds", "Bot API so'rovlari davomiyligi", ("method",))
+api_errors = registry.counter(
+    "telegram_api_errors_total", "Bot API xatolari", ("method", "error"))
+
+# Event loop
+loop_lag = registry.gauge(
+    "bot_event_loop_lag_seconds", "Event loop kechikishi (oxirgi o'lchov)")
+loop_lag_max = registry.gauge(
+    "bot_event_loop_lag_max_seconds", "Ishga tushgandan beri eng katta event loop kechikishi")
+
+
+class LoopLagMonitor:
+    """Har ``interval`` soniyada uyg'onib, rejadan qancha kechikkanini o'lchaydi"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - started - self.interval, 0.0)
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag.set(lag)
+            loop_lag_max.set(self.max_lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_monitor = LoopLagMonitor()
+_runner: Optional[web.AppRunner] = None
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int):
+    """/metrics ni alohida (odatda faqat lokal) portda ochish, port 0 bo'lsa o'chirilgan"""
+    global _runner
+
+    loop_monitor.start()
+    if not port or _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        # Masalan worker bot bilan bir xostda va port band: bot ishlashda davom etadi
+        logging.warning(f"Metrics serveri ishga tushmadi ({host}:{port}): {e}")
+        await runner.cleanup()
+        return
+    _runner = runner
+    logging.info(f"Metrics: http://{host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    global _runner
+
+    await loop_monitor.stop()
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
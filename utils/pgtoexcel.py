@@ -1,7 +1,23 @@
+import asyncio
+import csv
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from datetime import datetime
 
+from utils.db.postgres import select_users_after
+
+USER_HEADINGS = ['ID', 'Full Name', 'Username', 'Telegram ID', 'Is Admin', 'Is Banned', 'Created At']
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+def _naive(value):
+    # Agar datetime bo'lsa va tzinfo bor bo'lsa — uni tozalaymiz (Excel tz ni qo'llamaydi)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
 async def export_to_excel(data, headings, filepath):
     wb = openpyxl.Workbook()
     sheet = wb.active
@@ -14,10 +30,109 @@ async def export_to_excel(data, headings, filepath):
     # Asosiy ma'lumotlar
     for rowno, row in enumerate(data, start=2):
         for colno, cell_value in enumerate(row, start=1):
-            # Agar datetime bo'lsa va tzinfo bor bo'lsa — uni tozalaymiz
-            if isinstance(cell_value, datetime) and cell_value.tzinfo is not None:
-                cell_value = cell_value.replace(tzinfo=None)
-
-            sheet.cell(row=rowno, column=colno).value = cell_value
+            sheet.cell(row=rowno, column=colno).value = _naive(cell_value)
 
     wb.save(filepath)
+
+
+class XlsxExportWriter:
+    """write_only kitob: qatorlar diskdagi vaqtinchalik faylga oqib boradi, xotira o'smaydi"""
+
+    def __init__(self, filepath, headings):
+        self.filepath = filepath
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.sheet = self.wb.create_sheet("Users")
+        header = []
+        for heading in headings:
+            cell = WriteOnlyCell(self.sheet, value=heading)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self.sheet.append(header)
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append([_naive(value) for value in row])
+
+    def close(self):
+        self.wb.save(self.filepath)
+
+
+class CsvExportWriter:
+    def __init__(self, filepath, headings):
+        # utf-8-sig: Excel kirill/lotin harflarini to'g'ri ochishi uchun
+        self.file = open(filepath, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headings)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExportWriter:
+    """pyarrow ixtiyoriy: o'rnatilmagan bo'lsa faqat parquet formati ishlamaydi"""
+
+    def __init__(self, filepath, headings):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet uchun pyarrow o'rnatilmagan (pip install pyarrow)")
+        self.pa = pa
+        self.headings = headings
+        self.schema = pa.schema([
+            (headings[0], pa.int64()),
+            (headings[1], pa.string()),
+            (headings[2], pa.string()),
+            (headings[3], pa.int64()),
+            (headings[4], pa.bool_()),
+            (headings[5], pa.bool_()),
+            (headings[6], pa.timestamp('us', tz='UTC')),
+        ])
+        self.writer = pq.ParquetWriter(filepath, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        batch = self.pa.record_batch(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+
+
+EXPORT_WRITERS = {
+    'xlsx': XlsxExportWriter,
+    'csv': CsvExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+async def export_users(filepath, fmt='xlsx', chunk_size=5000) -> int:
+    """
+    Foydalanuvchilarni id bo'yicha sahifalab (keyset) faylga yozish.
+
+    Bazadan keyingi sahifa o'qilayotganda oldingisi alohida oqimda yoziladi,
+    shuning uchun event loop bloklanmaydi va xotirada bir-ikki sahifa turadi.
+    Yozilgan qatorlar sonini qaytaradi.
+    """
+    writer = await asyncio.to_thread(EXPORT_WRITERS[fmt], filepath, USER_HEADINGS)
+    total = 0
+    next_rows = None
+    try:
+        rows = await select_users_after(0, chunk_size)
+        while rows:
+            next_rows = asyncio.create_task(select_users_after(rows[-1][0], chunk_size))
+            await asyncio.to_thread(writer.write, rows)
+            total += len(rows)
+            rows = await next_rows
+            next_rows = None
+    finally:
+        if next_rows is not None:
+            next_rows.cancel()
+        await asyncio.to_thread(writer.close)
+    return total
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from data.config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL, PROFILE_FLUSH_INTERVAL
+from utils.cache import TTLCache
+from utils.db.models import User
+
+
+@dataclass
+class UserProfile:
+    """Har bir xabarda kerak bo'ladigan foydalanuvchi ma'lumotlari"""
+    telegram_id: int
+    lang: str = "uz"
+    is_banned: bool = False
+    is_admin: bool = False
+    is_active: bool = True
+
+
+class ProfileCache:
+    """
+    telegram_id bo'yicha profil keshi (LRU + TTL).
+
+    Birinchi murojaatda bazadan o'qiladi. Til o'zgarishi keshga darhol
+    yoziladi, bazaga esa fon vazifasida to'plab (write-behind) yuboriladi.
+    Bazada yo'q foydalanuvchi ham keshlanadi, add_user dan keyin ``put`` chaqiriladi.
+    """
+
+    _NOT_FOUND = object()
+
+    def __init__(self, maxsize: int, ttl: float, flush_interval: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Worker jarayonida profil bo'lmaydi, til DownloadJob bilan keladi
+        self._lang_hints = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._dirty_langs: Dict[int, str] = {}
+        self.flush_interval = flush_interval
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(self, telegram_id: int) -> Optional[UserProfile]:
+        cached = self._cache.get(telegram_id)
+        if cached is not None:
+            return None if cached is self._NOT_FOUND else cached
+
+        row = await User.filter(telegram_id=telegram_id).first().values(
+            'lang', 'is_banned', 'is_admin', 'is_active'
+        )
+        if row is None:
+            self._cache.set(telegram_id, self._NOT_FOUND)
+            return None
+
+        profile = UserProfile(telegram_id=telegram_id, **row)
+        # Hali bazaga yozilmagan til o'zgarishi ustun
+        profile.lang = self._dirty_langs.get(telegram_id, profile.lang)
+        self._cache.set(telegram_id, profile)
+        return profile
+
+    def peek(self, telegram_id: int) -> Optional[UserProfile]:
+        """Faqat keshdan, bazaga murojaat qilmasdan"""
+        cached = self._cache.get(telegram_id)
+        return None if cached is None or cached is self._NOT_FOUND else cached
+
+    def lang(self, telegram_id: int, default: str = "uz") -> str:
+        profile = self.peek(telegram_id)
+        if profile is not None:
+            return profile.lang
+        return self._lang_hints.get(telegram_id, default)
+
+    def hint_lang(self, telegram_id: int, lang: str):
+        self._lang_hints.set(telegram_id, lang)
+
+    def put(self, profile: UserProfile):
+        self._cache.set(profile.telegram_id, profile)
+
+    def invalidate(self, telegram_ids: Iterable[int]):
+        for telegram_id in telegram_ids:
+            self._cache.pop(telegram_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def set_lang(self, profile: UserProfile, lang: str):
+        profile.lang = lang
+        self._cache.set(profile.telegram_id, profile)
+        self._dirty_langs[profile.telegram_id] = lang
+
+    async def flush(self):
+        if not self._dirty_langs:
+            return
+        pending, self._dirty_langs = self._dirty_langs, {}
+        by_lang = defaultdict(list)
+        for telegram_id, lang in pending.items():
+            by_lang[lang].append(telegram_id)
+        try:
+            for lang, telegram_ids in by_lang.items():
+                await User.filter(telegram_id__in=telegram_ids).update(lang=lang)
+        except Exception as e:
+            logging.error(f"Profil o'zgarishlarini saqlashda xatolik: {e}")
+            # Keyingi urinishda qayta yoziladi, yangiroq qiymatlar ustun
+            self._dirty_langs = {**pending, **self._dirty_langs}
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+profile_cache = ProfileCache(
+    maxsize=PROFILE_CACHE_SIZE,
+    ttl=PROFILE_CACHE_TTL,
+    flush_interval=PROFILE_FLUSH_INTERVAL,
+)
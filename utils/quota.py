@@ -0,0 +1,30 @@
+from utils.state import StateBackend
+
+
+class HourlyQuota:
+    """
+    GCRA (Generic Cell Rate Algorithm) bo'yicha foydalanuvchi kvotasi.
+
+    Har bir foydalanuvchi uchun bitta son saqlanadi - TAT (theoretical arrival
+    time), tekshirish va sarflash O(1). Holat StateBackend da: Postgres bilan
+    restartdan keyin ham, bir nechta bot nusxasi orasida ham bitta limit.
+    """
+
+    def __init__(self, backend: StateBackend, limit: int, period: float = 3600):
+        self.backend = backend
+        self.limit = limit
+        self.interval = period / limit
+
+    def _key(self, user_id: int) -> str:
+        return f"quota:{user_id}"
+
+    async def allowed(self, user_id: int) -> bool:
+        result = await self.backend.gcra(self._key(user_id), self.interval, self.limit, cost=0)
+        return result.allowed
+
+    async def remaining(self, user_id: int) -> int:
+        result = await self.backend.gcra(self._key(user_id), self.interval, self.limit, cost=0)
+        return result.remaining
+
+    async def consume(self, user_id: int):
+        await self.backend.gcra(self._key(user_id), self.interval, self.limit)
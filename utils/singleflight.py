@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class Flight:
+    """Bitta kalit bo'yicha jarayondagi ish va uni kutayotganlar"""
+
+    __slots__ = ("future", "watchers")
+
+    def __init__(self):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.watchers: List[Any] = []
+
+
+class SingleFlight:
+    """
+    Bir xil kalit uchun parallel so'rovlarni bitta ishga birlashtirish.
+
+    Birinchi so'rov ``begin`` bilan ishni boshlaydi, keyingilari ``get``
+    orqali o'sha ``Flight`` ni topib, uning ``future`` ini kutadi.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+
+    def get(self, key: Hashable) -> Optional[Flight]:
+        return self._flights.get(key)
+
+    def begin(self, key: Hashable) -> Flight:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight()
+        return flight
+
+    def resolve(self, key: Hashable, result: Any = None):
+        """Natijani barcha kutayotganlarga tarqatish va kalitni bo'shatish"""
+        flight = self._flights.pop(key, None)
+        if flight is not None and not flight.future.done():
+            flight.future.set_result(result)
+
+    def __len__(self) -> int:
+        return len(self._flights)
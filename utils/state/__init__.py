@@ -0,0 +1,18 @@
+from data.config import STATE_BACKEND
+
+from .base import GcraResult, StateBackend
+from .memory import MemoryStateBackend
+from .postgres import PostgresStateBackend
+from .fsm import BackendStorage
+
+
+def create_state_backend(name: str) -> StateBackend:
+    """"postgres" - bir nechta bot nusxasi uchun umumiy holat, "memory" - jarayon ichida"""
+    if name == "postgres":
+        return PostgresStateBackend()
+    if name == "memory":
+        return MemoryStateBackend()
+    raise ValueError(f"Noma'lum STATE_BACKEND: {name}")
+
+
+state_backend = create_state_backend(STATE_BACKEND)
@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple, Optional
+
+
+class GcraResult(NamedTuple):
+    allowed: bool
+    remaining: int
+
+
+class StateBackend(ABC):
+    """
+    Bir nechta bot nusxalari o'rtasida umumiy holat: kalit-qiymat (FSM, flaglar)
+    va GCRA limitlari (throttling, kvotalar). Har bir amal atomar bo'lishi kerak.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def gcra(self, key: str, interval: float, burst: int, cost: int = 1) -> GcraResult:
+        """
+        ``interval`` soniyada bitta so'rov, ketma-ket ``burst`` tagacha.
+        cost=0 - faqat tekshirish (hech narsa sarflanmaydi)
+        """
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def gcra_remaining(tat: float, now: float, interval: float, burst: int) -> int:
+    used = max(tat, now) - now
+    return max(0, int((interval * burst - used) // interval))
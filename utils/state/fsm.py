@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from .base import StateBackend
+
+
+class BackendStorage(BaseStorage):
+    """aiogram FSM holati StateBackend da: so'rov boshqa bot nusxasiga tushsa ham holat saqlanadi"""
+
+    def __init__(self, backend: StateBackend, key_builder: Optional[KeyBuilder] = None):
+        self.backend = backend
+        self.key_builder = key_builder or DefaultKeyBuilder(prefix="fsm")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key, "state")
+        state = state.state if isinstance(state, State) else state
+        if state is None:
+            await self.backend.delete(storage_key)
+        else:
+            await self.backend.set(storage_key, state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self.backend.get(self.key_builder.build(key, "state"))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self.key_builder.build(key, "data")
+        if not data:
+            await self.backend.delete(storage_key)
+        else:
+            await self.backend.set(storage_key, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return await self.backend.get(self.key_builder.build(key, "data")) or {}
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,57 @@
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import GcraResult, StateBackend, gcra_remaining
+
+
+class MemoryStateBackend(StateBackend):
+    """
+    Jarayon ichidagi holat: bitta nusxa yoki development uchun.
+
+    GCRA yozuvi faqat to'liq tiklangandan keyin (TAT o'tib ketgan) o'chiriladi,
+    shuning uchun throttling kalitlari ko'paysa ham tugamagan kvotalar yo'qolmaydi.
+    Muddati o'tganlar TAT bo'yicha heap orqali topiladi.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._tats: Dict[str, float] = {}
+        # (tat, key): kalit yangilansa eski yozuv heap da qoladi va o'tkazib yuboriladi
+        self._expiry: List[Tuple[float, str]] = []
+
+    async def get(self, key: str) -> Any:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._values[key] = (time.monotonic() + ttl if ttl else None, value)
+
+    async def delete(self, key: str):
+        self._values.pop(key, None)
+
+    def _evict(self, now: float):
+        expiry, tats = self._expiry, self._tats
+        while expiry and expiry[0][0] <= now:
+            tat, key = heapq.heappop(expiry)
+            if tats.get(key) == tat:
+                del tats[key]
+
+    async def gcra(self, key: str, interval: float, burst: int, cost: int = 1) -> GcraResult:
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        # cost=0 da ham bitta so'rov o'tishi mumkinmi deb tekshiriladi
+        new_tat = tat + interval * max(cost, 1)
+        allowed = new_tat - now <= interval * burst
+        if allowed and cost:
+            self._tats[key] = new_tat
+            heapq.heappush(self._expiry, (new_tat, key))
+            tat = new_tat
+        self._evict(now)
+        return GcraResult(allowed, gcra_remaining(tat, now, interval, burst))
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from tortoise import connections
+
+from .base import GcraResult, StateBackend, gcra_remaining
+
+
+# Vaqt bazaning soatidan olinadi: nusxalar soati farq qilsa ham limit bir xil
+GCRA_CONSUME_SQL = """
+INSERT INTO rate_limits AS r (key, tat)
+VALUES ($1, EXTRACT(EPOCH FROM now())::float8 + $2::float8)
+ON CONFLICT (key) DO UPDATE
+    SET tat = GREATEST(r.tat, EXTRACT(EPOCH FROM now())::float8) + $2::float8
+    WHERE GREATEST(r.tat, EXTRACT(EPOCH FROM now())::float8) + $2::float8 - EXTRACT(EPOCH FROM now())::float8 <= $3::float8
+RETURNING tat, EXTRACT(EPOCH FROM now())::float8 AS now
+"""
+
+GCRA_PEEK_SQL = """
+SELECT COALESCE((SELECT tat FROM rate_limits WHERE key = $1), 0) AS tat, EXTRACT(EPOCH FROM now())::float8 AS now
+"""
+
+STATE_GET_SQL = """
+SELECT value FROM state_entries
+WHERE key = $1 AND (expires_at IS NULL OR expires_at > EXTRACT(EPOCH FROM now())::float8)
+"""
+
+STATE_SET_SQL = """
+INSERT INTO state_entries (key, value, expires_at)
+VALUES ($1, $2::jsonb, CASE WHEN $3::float8 IS NULL THEN NULL ELSE EXTRACT(EPOCH FROM now())::float8 + $3::float8 END)
+ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+"""
+
+CLEANUP_SQL = """
+DELETE FROM rate_limits WHERE tat < EXTRACT(EPOCH FROM now())::float8;
+DELETE FROM state_entries WHERE expires_at < EXTRACT(EPOCH FROM now())::float8;
+"""
+
+
+class PostgresStateBackend(StateBackend):
+    """
+    Holat Postgresda (rate_limits va state_entries jadvallari): har bir amal
+    bitta atomar so'rov (INSERT ... ON CONFLICT), shuning uchun bir nechta
+    bot nusxasi bir xil limit va FSM holatini ko'radi.
+    """
+
+    def __init__(self, cleanup_interval: float = 300):
+        self.cleanup_interval = cleanup_interval
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _db():
+        return connections.get("default")
+
+    async def get(self, key: str) -> Any:
+        rows = await self._db().execute_query_dict(STATE_GET_SQL, [key])
+        if not rows:
+            return None
+        value = rows[0]["value"]
+        return json.loads(value) if isinstance(value, str) else value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self._db().execute_query(STATE_SET_SQL, [key, json.dumps(value), ttl])
+
+    async def delete(self, key: str):
+        await self._db().execute_query("DELETE FROM state_entries WHERE key = $1", [key])
+
+    async def gcra(self, key: str, interval: float, burst: int, cost: int = 1) -> GcraResult:
+        if cost:
+            rows = await self._db().execute_query_dict(
+                GCRA_CONSUME_SQL, [key, interval * cost, interval * burst]
+            )
+            if not rows:
+                # WHERE sharti bajarilmadi: limit tugagan
+                return GcraResult(False, 0)
+            return GcraResult(True, gcra_remaining(rows[0]["tat"], rows[0]["now"], interval, burst))
+
+        rows = await self._db().execute_query_dict(GCRA_PEEK_SQL, [key])
+        tat, now = rows[0]["tat"], rows[0]["now"]
+        return GcraResult(max(tat, now) + interval - now <= interval * burst, gcra_remaining(tat, now, interval, burst))
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self._db().execute_script(CLEANUP_SQL)
+            except Exception as e:
+                logging.error(f"Holat jadvallarini tozalashda xatolik: {e}")
+
+    async def start(self):
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def close(self):
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+            self._cleanup_task = None
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from data.config import STATS_RECONCILE_INTERVAL, STATS_DAYS
+from utils.db.models import Download
+
+
+class BotStats:
+    """
+    /stat uchun xotiradagi hisoblagichlar.
+
+    Foydalanuvchi va yuklash hooklari sonlarni darhol o'zgartiradi, fon vazifasi
+    esa ularni vaqti-vaqti bilan bazadagi agregat SQL natijasi bilan tenglashtiradi
+    (boshqa nusxalar va hooklardan o'tmagan o'zgarishlar shu yerda to'g'rilanadi).
+    """
+
+    def __init__(self, reconcile_interval: float, days: int):
+        self.reconcile_interval = reconcile_interval
+        self.days = days
+        self.users_total = 0
+        self.users_banned = 0
+        self.users_active = 0
+        self.new_users: Dict[date, int] = {}
+        # Oxirgi ``days`` kundagi yuklashlar: yetkazilgan, xato va o'rtacha vaqt
+        self.downloads: Counter = Counter()
+        self.download_failures: Counter = Counter()
+        self.download_seconds: Dict[str, float] = {}
+        self.reconciled_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    # --- hooklar ---
+
+    def user_added(self):
+        self.users_total += 1
+        self.users_active += 1
+        today = self._today()
+        self.new_users[today] = self.new_users.get(today, 0) + 1
+
+    def user_banned(self, was_active: bool = True):
+        self.users_banned += 1
+        if was_active:
+            self.users_active = max(self.users_active - 1, 0)
+
+    def users_deactivated(self, count: int):
+        self.users_active = max(self.users_active - count, 0)
+
+    def user_reactivated(self):
+        self.users_active += 1
+
+    def users_deleted(self):
+        self.users_total = self.users_banned = self.users_active = 0
+        self.new_users.clear()
+
+    def download_recorded(self, platform: str, outcome: str):
+        if outcome in Download.DELIVERED:
+            self.downloads[platform] += 1
+        elif outcome in Download.FAILURES:
+            self.download_failures[platform] += 1
+
+    # --- bazaga tenglashtirish ---
+
+    async def reconcile(self):
+        from utils.db.postgres import download_stats, user_stats
+
+        totals, daily = await user_stats(self.days)
+        platforms = await download_stats(self.days)
+        self.users_total = totals['total']
+        self.users_banned = totals['banned']
+        self.users_active = totals['active']
+        self.new_users = {row['day']: row['joined'] for row in daily}
+        self.downloads = Counter({row['platform']: row['delivered'] for row in platforms})
+        self.download_failures = Counter({row['platform']: row['failed'] for row in platforms})
+        self.download_seconds = {
+            row['platform']: row['avg_seconds'] for row in platforms if row['avg_seconds'] is not None
+        }
+        self.reconciled_at = datetime.now(timezone.utc)
+
+    def new_users_by_day(self) -> Dict[date, int]:
+        today = self._today()
+        return {
+            day: self.new_users.get(day, 0)
+            for day in (today - timedelta(days=i) for i in range(self.days))
+        }
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.error(f"Statistikani yangilashda xatolik: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+bot_stats = BotStats(reconcile_interval=STATS_RECONCILE_INTERVAL, days=STATS_DAYS)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
+
+from .jobs import DownloadJob
+
+
+JobCallback = Callable[[DownloadJob], Awaitable[Any]]
+
+
+class AMQPDownloadQueue:
+    """
+    RabbitMQ (AMQP) ustidagi doimiy yuklab olish navbati.
+
+    Ishlar ``persistent`` xabar sifatida saqlanadi, shuning uchun bot yoki
+    worker qayta ishga tushganda yo'qolmaydi. Worker bir vaqtda ``prefetch``
+    tadan ko'p ish olmaydi, muvaffaqiyatsiz ishlar ``<queue>.dead`` ga tushadi.
+    """
+
+    def __init__(self, url: str, queue_name: str = "downloads", prefetch: int = 10):
+        self.url = url
+        self.queue_name = queue_name
+        self.prefetch = prefetch
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._queue: Optional[aio_pika.abc.AbstractQueue] = None
+        self._consumer_tag: Optional[str] = None
+
+    async def connect(self):
+        self._connection = await aio_pika.connect_robust(self.url)
+        self._channel = await self._connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch)
+
+        dead_exchange = await self._channel.declare_exchange(
+            f"{self.queue_name}.dlx", aio_pika.ExchangeType.DIRECT, durable=True
+        )
+        dead_queue = await self._channel.declare_queue(f"{self.queue_name}.dead", durable=True)
+        await dead_queue.bind(dead_exchange, routing_key=self.queue_name)
+
+        self._queue = await self._channel.declare_queue(
+            self.queue_name,
+            durable=True,
+            arguments={
+                "x-dead-letter-exchange": f"{self.queue_name}.dlx",
+                "x-dead-letter-routing-key": self.queue_name,
+            },
+        )
+        logging.info(f"AMQP navbatiga ulanildi: {self.queue_name}")
+
+    async def publish(self, job: DownloadJob):
+        await self._channel.default_exchange.publish(
+            aio_pika.Message(
+                body=job.to_json().encode(),
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=self.queue_name,
+        )
+
+    async def consume(self, callback: JobCallback):
+        """Ishlarni qabul qilish: muvaffaqiyatli bo'lsa ack, aks holda dead-letter"""
+        async def on_message(message: AbstractIncomingMessage):
+            try:
+                job = DownloadJob.from_json(message.body)
+            except Exception as e:
+                logging.error(f"Noto'g'ri ish formati: {e}")
+                await message.reject(requeue=False)
+                return
+
+            try:
+                await callback(job)
+            except Exception as e:
+                logging.exception(f"Ish bajarilmadi ({job.kind} {job.url}): {e}")
+                await message.reject(requeue=False)
+            else:
+                await message.ack()
+
+        self._consumer_tag = await self._queue.consume(on_message)
+
+    async def close(self):
+        if self._queue is not None and self._consumer_tag:
+            await self._queue.cancel(self._consumer_tag)
+            self._consumer_tag = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class InMemoryDownloadQueue:
+    """
+    ``AMQPDownloadQueue`` bilan bir xil interfeysli jarayon ichidagi navbat.
+
+    Broker o'rnatilmagan muhitda va testlarda ishlatish uchun: ishlar JSON
+    orqali o'tadi, ``prefetch`` chegarasi va dead-letter ro'yxati ham bor.
+    """
+
+    def __init__(self, queue_name: str = "downloads", prefetch: int = 10):
+        self.queue_name = queue_name
+        self.prefetch = prefetch
+        self.dead_letters: List[DownloadJob] = []
+        self.acked = 0
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        pass
+
+    async def publish(self, job: DownloadJob):
+        self._queue.put_nowait(job.to_json())
+
+    async def consume(self, callback: JobCallback):
+        semaphore = asyncio.Semaphore(self.prefetch)
+
+        async def handle(raw: str):
+            job = DownloadJob.from_json(raw)
+            try:
+                await callback(job)
+            except Exception as e:
+                logging.exception(f"Ish bajarilmadi ({job.kind} {job.url}): {e}")
+                self.dead_letters.append(job)
+            else:
+                self.acked += 1
+            finally:
+                self._queue.task_done()
+                semaphore.release()
+
+        async def loop():
+            while True:
+                raw = await self._queue.get()
+                await semaphore.acquire()
+                asyncio.create_task(handle(raw))
+
+        self._consumer = asyncio.create_task(loop())
+
+    async def join(self):
+        await self._queue.join()
+
+    async def close(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+
+
+def is_in_memory(url: str) -> bool:
+    return url.startswith("memory://")
+
+
+def create_download_queue(url: str, prefetch: int = 10):
+    """``memory://`` uchun jarayon ichidagi navbat, aks holda AMQP"""
+    if is_in_memory(url):
+        return InMemoryDownloadQueue(prefetch=prefetch)
+    return AMQPDownloadQueue(url, prefetch=prefetch)
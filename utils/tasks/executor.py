@@ -0,0 +1,198 @@
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from data.config import DOWNLOAD_BACKENDS, PROCESS_POOL_SIZE, PROCESS_MAX_JOBS_PER_CHILD, DOWNLOAD_TIMEOUT
+
+
+ProgressCallback = Callable[[float], Any]
+
+
+class ThreadBackend:
+    """Bloklovchi funksiyani ``asyncio.to_thread`` orqali bajarish"""
+
+    async def run(self, func, *args, on_progress: Optional[ProgressCallback] = None,
+                  progress_kwarg: str = "progress_hook", **kwargs):
+        if on_progress is not None:
+            loop = asyncio.get_running_loop()
+            kwargs[progress_kwarg] = lambda progress: loop.call_soon_threadsafe(on_progress, progress)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def shutdown(self):
+        pass
+
+
+def _child_main(conn):
+    """Bola jarayon: pipe orqali ish olib, progress va natijani qaytaradi"""
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        func, args, kwargs, progress_kwarg = message
+        if progress_kwarg:
+            kwargs[progress_kwarg] = lambda progress: conn.send(("progress", progress))
+        try:
+            conn.send(("result", func(*args, **kwargs)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Child:
+    __slots__ = ("process", "conn", "jobs")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class ProcessBackend:
+    """
+    Nazorat ostidagi jarayonlar puli.
+
+    yt-dlp va Instaloader alohida interpretatorda ishlaydi, shuning uchun
+    ularning CPU yuklamasi aiogram event loop ini sekinlashtirmaydi. Har bir
+    bola jarayon ``max_jobs_per_child`` ta ishdan keyin almashtiriladi, vaqt
+    chegarasidan oshgan ish esa jarayon bilan birga o'ldiriladi.
+    """
+
+    def __init__(self, workers: int = 2, max_jobs_per_child: int = 50, timeout: float = 300):
+        self.workers = workers
+        self.max_jobs_per_child = max_jobs_per_child
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = asyncio.Semaphore(workers)
+        self._idle: List[_Child] = []
+
+    def _spawn(self) -> _Child:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_child_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return _Child(process, parent_conn)
+
+    @staticmethod
+    def _kill(child: _Child):
+        if child.process.is_alive():
+            child.process.kill()
+        child.process.join(timeout=5)
+        child.conn.close()
+
+    @staticmethod
+    def _retire(child: _Child):
+        try:
+            child.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        child.process.join(timeout=5)
+        if child.process.is_alive():
+            child.process.kill()
+        child.conn.close()
+
+    @staticmethod
+    def _read(child: _Child, timeout: float, report: Optional[ProgressCallback]):
+        """Natija yoki xato kelguncha bola jarayon xabarlarini o'qish"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not child.conn.poll(remaining):
+                raise TimeoutError(f"Ish {timeout:.0f} soniyada tugamadi")
+            kind, payload = child.conn.recv()
+            if kind != "progress":
+                return kind, payload
+            if report is not None:
+                report(payload)
+
+    async def run(self, func, *args, on_progress: Optional[ProgressCallback] = None,
+                  progress_kwarg: str = "progress_hook", timeout: Optional[float] = None, **kwargs):
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+
+        async with self._slots:
+            child = self._idle.pop() if self._idle else self._spawn()
+            healthy = False
+            try:
+                child.conn.send((func, args, kwargs, progress_kwarg if on_progress else None))
+                report = None
+                if on_progress is not None:
+                    report = lambda progress: loop.call_soon_threadsafe(on_progress, progress)
+                # Ish davomida pipe ni bitta thread o'qiydi, progress loop ga
+                # call_soon_threadsafe orqali yetkaziladi
+                kind, payload = await asyncio.to_thread(self._read, child, timeout, report)
+                healthy = True
+                if kind == "error":
+                    raise RuntimeError(payload)
+                return payload
+            except (EOFError, ConnectionError) as e:
+                raise RuntimeError(f"Yuklab olish jarayoni to'xtab qoldi: {e}") from e
+            finally:
+                if not healthy:
+                    await asyncio.to_thread(self._kill, child)
+                else:
+                    child.jobs += 1
+                    if child.jobs >= self.max_jobs_per_child:
+                        await asyncio.to_thread(self._retire, child)
+                    else:
+                        self._idle.append(child)
+
+    async def shutdown(self):
+        idle, self._idle = self._idle, []
+        for child in idle:
+            await asyncio.to_thread(self._retire, child)
+
+
+_backends: Dict[str, Any] = {}
+
+# Platforma funksiyalari ishlatadigan og'ir modullar (handlerlar ularni ichida import qiladi)
+PLATFORM_MODULES = {
+    "youtube": "yt_dlp",
+    "audio": "yt_dlp",
+    "tiktok": "yt_dlp",
+    "instagram": "utils.instagram_sessions",
+}
+
+
+def get_backend(platform: str):
+    """Platforma uchun sozlangan bajarish backendini olish ("thread" yoki "process")"""
+    name = DOWNLOAD_BACKENDS.get(platform, "thread")
+    backend = _backends.get(name)
+    if backend is None:
+        if name == "process":
+            backend = ProcessBackend(
+                workers=PROCESS_POOL_SIZE,
+                max_jobs_per_child=PROCESS_MAX_JOBS_PER_CHILD,
+                timeout=DOWNLOAD_TIMEOUT,
+            )
+        else:
+            backend = ThreadBackend()
+        _backends[name] = backend
+        logging.info(f"{platform} uchun {name} backend ishlatiladi")
+    return backend
+
+
+async def shutdown_backends():
+    for backend in list(_backends.values()):
+        await backend.shutdown()
+    _backends.clear()
+
+
+async def prewarm_backends():
+    """
+    Thread backenddagi platformalar modullarini polling boshlangandan keyin fonda
+    import qilish, shunda birinchi foydalanuvchi import vaqtini kutmaydi.
+    Process backend bolalari ularni o'zlari import qiladi.
+    """
+    modules = sorted({
+        PLATFORM_MODULES[platform]
+        for platform, name in DOWNLOAD_BACKENDS.items()
+        if name == "thread" and platform in PLATFORM_MODULES
+    })
+    for module in modules:
+        await asyncio.to_thread(importlib.import_module, module)
@@ -0,0 +1,76 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+# yt_dlp og'ir kutubxona: birinchi ishda yoki startupdan keyin fonda import qilinadi
+if TYPE_CHECKING:
+    import yt_dlp
+
+
+@dataclass
+class MediaResult:
+    """Yuklab olish natijasi"""
+    success: bool
+    file_path: Optional[str] = None
+    media_id: Optional[str] = None
+    title: str = 'Unknown'
+    uploader: str = 'Unknown'
+    duration: int = 0
+    file_size: int = 0
+    error: Optional[str] = None
+    # extract_info ga ketgan vaqt (soniya), analitika uchun
+    extract_time: float = 0.0
+
+
+def downloaded_file_path(ydl: "yt_dlp.YoutubeDL", info: dict) -> str:
+    """yt-dlp yozgan faylning aniq yo'li (post-processorlardan keyingi)"""
+    requested = info.get('requested_downloads') or []
+    if requested and requested[0].get('filepath'):
+        return requested[0]['filepath']
+    return info.get('filepath') or ydl.prepare_filename(info)
+
+
+def extract_and_download(url: str, ydl_opts: dict, max_duration: Optional[int] = None) -> MediaResult:
+    """
+    Ma'lumotni bir marta olib, o'sha info dict dan yuklab olish.
+
+    ``extract_info`` faqat bir marta chaqiriladi: uzunlik tekshiruvi, yuklab
+    olish (``process_ie_result``) va caption uchun bitta natija ishlatiladi.
+    """
+    import yt_dlp
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            started = time.monotonic()
+            info = ydl.extract_info(url, download=False)
+            extract_time = time.monotonic() - started
+            duration = int(info.get('duration') or 0)
+
+            if max_duration and duration > max_duration:
+                return MediaResult(
+                    success=False,
+                    media_id=info.get('id'),
+                    duration=duration,
+                    error=f'Video juda uzun ({max_duration // 60} daqiqadan ortiq)',
+                    extract_time=extract_time,
+                )
+
+            info = ydl.process_ie_result(info, download=True)
+            file_path = downloaded_file_path(ydl, info)
+
+        if not os.path.exists(file_path):
+            return MediaResult(success=False, media_id=info.get('id'), error='Fayl yuklanmadi', extract_time=extract_time)
+
+        return MediaResult(
+            success=True,
+            file_path=file_path,
+            media_id=info.get('id'),
+            title=info.get('title') or 'Unknown',
+            uploader=info.get('uploader') or 'Unknown',
+            duration=duration,
+            file_size=os.path.getsize(file_path),
+            extract_time=extract_time,
+        )
+    except Exception as e:
+        return MediaResult(success=False, error=str(e))
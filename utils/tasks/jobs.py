@@ -0,0 +1,54 @@
+import json
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.enums import ChatType
+from aiogram.types import Chat, Message, User
+
+
+@dataclass
+class DownloadJob:
+    """
+    Navbatga qo'yiladigan yuklab olish ishi.
+
+    Faqat javob berish uchun kerakli maydonlar saqlanadi, shuning uchun
+    ish JSON ko'rinishida brokerga yuborilib, boshqa jarayonda bajarilishi mumkin.
+    """
+    chat_id: int
+    message_id: int
+    user_id: int
+    url: str
+    kind: str
+    lang: str = "uz"
+    enqueued_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_message(cls, message: Message, url: str, kind: str, lang: str = "uz") -> "DownloadJob":
+        return cls(
+            chat_id=message.chat.id,
+            message_id=message.message_id,
+            user_id=message.from_user.id,
+            url=url,
+            kind=kind,
+            lang=lang,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw) -> "DownloadJob":
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode()
+        return cls(**json.loads(raw))
+
+    def as_message(self, bot: Bot) -> Message:
+        """Foydalanuvchi xabariga javob berish uchun minimal Message obyekti"""
+        return Message(
+            message_id=self.message_id,
+            date=datetime.fromtimestamp(self.enqueued_at),
+            chat=Chat(id=self.chat_id, type=ChatType.PRIVATE),
+            from_user=User(id=self.user_id, is_bot=False, first_name=""),
+        ).as_(bot)
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+
+Job = Tuple[Callable[..., Awaitable[Any]], tuple]
+
+
+class DownloadWorkerPool:
+    """
+    Yuklab olish ishlari uchun doimiy workerlar puli.
+
+    Workerlar ``asyncio.Queue.get()`` da bloklanib turadi, shuning uchun
+    navbat bo'sh bo'lganda event loop uyg'onmaydi, yangi ish esa darhol
+    bo'sh workerga tushadi. Band slotlar soni pulning o'zida hisoblanadi.
+    """
+
+    def __init__(self, workers: int = 10, name: str = "download"):
+        self.size = workers
+        self.name = name
+        self.active = 0
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """Navbatda kutayotgan ishlar soni"""
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args) -> int:
+        """Ishni navbatga qo'yish, navbatdagi o'rnini qaytaradi"""
+        self._queue.put_nowait((func, args))
+        return self._queue.qsize()
+
+    async def _worker(self, number: int):
+        while True:
+            func, args = await self._queue.get()
+            self.active += 1
+            try:
+                await func(*args)
+            except Exception as e:
+                logging.exception(f"{self.name}-worker-{number}: ishda xatolik: {e}")
+            finally:
+                self.active -= 1
+                self._queue.task_done()
+
+    def start(self):
+        """Workerlarni ishga tushirish"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(number), name=f"{self.name}-worker-{number}")
+            for number in range(self.size)
+        ]
+        logging.info(f"{self.name} pool: {self.size} ta worker ishga tushdi")
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Navbatdagi barcha ishlar tugashini kutish"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self, drain_timeout: Optional[float] = 30):
+        """Navbatni bo'shatib, workerlarni to'xtatish"""
+        if not self._workers:
+            return
+        if drain_timeout:
+            if not await self.drain(drain_timeout):
+                logging.warning(
+                    f"{self.name} pool: {self.pending} ta ish navbatda, {self.active} ta ish jarayonda qoldi"
+                )
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logging.info(f"{self.name} pool to'xtatildi")
@@ -0,0 +1,49 @@
+import asyncio
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from data.config import DOWNLOAD_TIMEOUT
+
+
+JOBS_DIR = Path("downloads") / "jobs"
+
+# Har bir ishning natija fayli shu nom bilan yoziladi (kengaytmani yt-dlp qo'yadi)
+OUTPUT_TEMPLATE = "media.%(ext)s"
+
+
+@asynccontextmanager
+async def job_workdir(prefix: str = "job"):
+    """
+    Ish uchun alohida vaqtinchalik papka.
+
+    Ish tugaganda yoki xatolik bilan to'xtaganda papka butunlay o'chiriladi,
+    shuning uchun bir foydalanuvchining parallel ishlari bir-biriga aralashmaydi.
+    """
+    path = JOBS_DIR / f"{prefix}_{uuid.uuid4().hex}"
+    path.mkdir(parents=True)
+    try:
+        yield path
+    finally:
+        await asyncio.to_thread(shutil.rmtree, path, True)
+
+
+def clear_stale_workdirs(max_age: float = DOWNLOAD_TIMEOUT * 2):
+    """
+    Oldingi ishga tushirishlardan qolib ketgan papkalarni o'chirish.
+
+    Papka boshqa nusxalar bilan umumiy bo'lishi mumkin, shuning uchun faqat
+    ``max_age`` soniyadan eski papkalar o'chiriladi: ishlayotgan ish bunchalik
+    uzoq davom etmaydi (yuklash DOWNLOAD_TIMEOUT bilan cheklangan, qolgani yuborish).
+    """
+    if not JOBS_DIR.exists():
+        return
+    cutoff = time.time() - max_age
+    for path in JOBS_DIR.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except FileNotFoundError:
+            pass
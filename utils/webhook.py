@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from data.config import (
+    BOT_TOKEN, WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_MAX_IN_FLIGHT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+)
+from utils.metrics import registry
+
+
+def webhook_secret() -> str:
+    """Barcha nusxalarda bir xil bo'lishi uchun berilmasa tokendan hosil qilinadi"""
+    return WEBHOOK_SECRET or hashlib.sha256(BOT_TOKEN.encode()).hexdigest()
+
+
+def webhook_url() -> str:
+    return WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """
+    Update javob qaytarilgunga qadar ishlanadi, bir vaqtda ``max_in_flight`` tadan
+    ko'p emas. Qolganlari ulanishda kutadi: Telegram max_connections dan ortiq
+    yubormaydi, shuning uchun yuklama nusxalar orasida taqsimlanadi.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_in_flight: int, **kwargs):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=False, **kwargs)
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                return await super().handle(request)
+            finally:
+                self.in_flight -= 1
+
+
+def run_webhook(dispatcher: Dispatcher, bot: Bot):
+    app = web.Application()
+    handler = LimitedRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        max_in_flight=WEBHOOK_MAX_IN_FLIGHT,
+        secret_token=webhook_secret(),
+    )
+    handler.register(app, path=WEBHOOK_PATH)
+    registry.gauge("bot_webhook_in_flight", "Ishlanayotgan webhook update lari", func=lambda: handler.in_flight)
+
+    async def healthz(request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "in_flight": handler.in_flight,
+            "max_in_flight": handler.max_in_flight,
+        })
+
+    app.router.add_get("/healthz", healthz)
+    # dispatcher.startup/shutdown hooklari aiohttp ilovasining hayot sikliga ulanadi
+    setup_application(app, dispatcher, bot=bot)
+    web.run_app(app, host=WEBAPP_HOST, port=WEBAPP_PORT)
@@ -0,0 +1,58 @@
+import asyncio
+from aiogram import Bot
+from aiogram.client.session.middlewares.request_logging import logger
+
+
+async def main():
+    """Yuklab olish ishlarini brokerdan olib bajaruvchi alohida worker"""
+    from tortoise import Tortoise
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+    from data.config import BOT_TOKEN, AMQP_URL
+    from app import database_connected
+    from handlers.users.download_media import process_job, release_download_resources, MAX_CONCURRENT_DOWNLOADS
+    from utils.tasks.broker import create_download_queue, is_in_memory
+    from utils.tasks.workdir import clear_stale_workdirs
+    from utils.state import state_backend
+    from middlewares.request_limiter import request_limiter
+    from middlewares.api_metrics import api_metrics
+    from utils.analytics import download_recorder
+    from utils.metrics import start_metrics_server, stop_metrics_server
+    from data.config import METRICS_HOST, METRICS_PORT
+
+    if not AMQP_URL:
+        raise SystemExit("AMQP_URL ko'rsatilmagan: worker faqat broker bilan ishlaydi")
+    if is_in_memory(AMQP_URL):
+        raise SystemExit("memory:// navbati faqat bot jarayoni ichida ishlaydi, worker uchun AMQP kerak")
+
+    await database_connected()
+    await state_backend.start()
+    clear_stale_workdirs()
+    download_recorder.start()
+    await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(request_limiter)
+    bot.session.middleware(api_metrics)
+    queue = create_download_queue(AMQP_URL, prefetch=MAX_CONCURRENT_DOWNLOADS)
+    await queue.connect()
+    await queue.consume(lambda job: process_job(job, bot))
+    logger.info("Worker ishga tushdi")
+
+    try:
+        await asyncio.Future()
+    finally:
+        # app.py dagi stop_queue_processing bilan bir xil tartib
+        await queue.close()
+        await release_download_resources()
+        await download_recorder.stop()
+        await stop_metrics_server()
+        await state_backend.close()
+        await bot.session.close()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Worker stopped!")